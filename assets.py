@@ -0,0 +1,97 @@
+import pygame
+
+class AssetCache:
+    def __init__(self):
+        # Loaded surfaces and masks keyed by (path, size); size is None for unscaled images
+        self.images = {}
+        self.masks = {}
+        self.sounds = {}
+        self.bundle = None  # Baked AssetBundle tried before the image and sound files
+        self.hits = 0
+        self.misses = 0
+        self.bundled = 0    # Misses served by the bundle
+
+    def image(self, path, size=None):
+        # Return the shared surface for path scaled to size, loading it only on the first request
+        key = (path, size)
+        image = self.images.get(key)
+        if image is not None:
+            self.hits += 1
+            return image
+        self.misses += 1
+        image = self.bundle.image(path, size) if self.bundle is not None else None
+        if image is not None:
+            self.bundled += 1
+        else:
+            image = pygame.image.load(path)
+            if size is not None:
+                image = pygame.transform.scale(image, size)
+            if pygame.display.get_surface() is not None:  # convert_alpha() needs a display mode
+                image = image.convert_alpha()
+        self.images[key] = image
+        return image
+
+    def mask(self, path, size=None):
+        # Return the shared collision mask of the image at path scaled to size
+        key = (path, size)
+        mask = self.masks.get(key)
+        if mask is not None:
+            self.hits += 1
+            return mask
+        self.misses += 1
+        mask = self.bundle.mask(path, size) if self.bundle is not None else None
+        if mask is not None:
+            self.bundled += 1
+        else:
+            # Built from the image, which only counts as a lookup of its own when it has to be loaded too
+            image = self.images.get(key)
+            if image is None:
+                image = self.image(path, size)
+            mask = pygame.mask.from_surface(image)
+        self.masks[key] = mask
+        return mask
+
+    def sound(self, path):
+        # Return the shared decoded sound at path, needs an initialized mixer
+        sound = self.sounds.get(path)
+        if sound is not None:
+            self.hits += 1
+            return sound
+        self.misses += 1
+        sound = self.bundle.sound(path) if self.bundle is not None else None
+        if sound is not None:
+            self.bundled += 1
+        else:
+            sound = pygame.mixer.Sound(path)
+        self.sounds[path] = sound
+        return sound
+
+    def use_bundle(self, bundle):
+        # Serve later loads from a baked AssetBundle (see bundle.py), None goes back to the files only
+        self.bundle = bundle
+
+    def preload(self, sprites):
+        # Load images and masks up front so that nothing is read from disk inside the game loop
+        for path, size in sprites:
+            self.mask(path, size)
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.bundled = 0
+
+    def stats(self):
+        stale = self.bundle.stale if self.bundle is not None else 0
+        return {"hits": self.hits, "misses": self.misses, "bundled": self.bundled, "stale": stale,
+                "images": len(self.images), "masks": len(self.masks), "sounds": len(self.sounds)}
+
+assets = AssetCache()  # Registry shared by every entity
+
+# Sprites used by the entities as (path, size), preloaded by Game
+PLAYER_SPRITE = ("images/player.png", (25, 25))
+BASIC_ENEMY_SPRITE = ("images/enemy_pc.png", (25, 25))
+ADVANCED_ENEMY_SPRITE = ("images/enemy_pc_adv.png", (25, 25))
+BULLET_SPRITE = ("images/bullet.png", (15, 15))
+COIN_SPRITE = ("images/coin.png", (20, 20))
+
+SPRITES = [PLAYER_SPRITE, BASIC_ENEMY_SPRITE, ADVANCED_ENEMY_SPRITE, BULLET_SPRITE, COIN_SPRITE]
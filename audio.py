@@ -0,0 +1,62 @@
+from assets import assets
+import pygame
+import time
+
+class AudioManager:
+    def __init__(self, channels=8, min_interval=0.05):
+        # Sound effects play on a fixed pool of mixer channels; when every channel is busy the one
+        # playing the longest is stolen. A sound is not restarted within min_interval seconds of
+        # its last start. Music is streamed from disk by pygame.mixer.music, one track at a time.
+        pygame.mixer.set_num_channels(channels)
+        self.channels = [pygame.mixer.Channel(index) for index in range(channels)]
+        self.started = [0.0] * channels  # When each channel's current sound started
+        self.min_interval = min_interval
+        self.sounds = {}       # Decoded effects by path
+        self.last_played = {}  # Path -> start time, for rate limiting
+        self.music = None      # Path of the track playing
+        self.played = 0
+        self.limited = 0
+        self.stolen = 0
+
+    def sound(self, path):
+        sound = self.sounds.get(path)
+        if sound is None:
+            sound = assets.sound(path)  # From the asset bundle when baked
+            self.sounds[path] = sound
+        return sound
+
+    def play(self, path, min_interval=None):
+        # Play a sound effect unless it was started less than min_interval seconds ago
+        now = time.perf_counter()
+        interval = self.min_interval if min_interval is None else min_interval
+        if now - self.last_played.get(path, -interval) < interval:
+            self.limited += 1
+            return
+        self.last_played[path] = now
+
+        index = next((index for index, channel in enumerate(self.channels) if not channel.get_busy()), None)
+        if index is None:
+            index = self.started.index(min(self.started))  # Steal the oldest voice
+            self.channels[index].stop()
+            self.stolen += 1
+        self.channels[index].play(self.sound(path))
+        self.started[index] = now
+        self.played += 1
+
+    def play_music(self, path, volume=1.0):
+        # Loop the track at path; None stops the music. Asking for the track already playing does nothing.
+        if path == self.music:
+            return
+        if path is None:
+            pygame.mixer.music.stop()
+            pygame.mixer.music.unload()
+        else:
+            pygame.mixer.music.load(path)
+            pygame.mixer.music.set_volume(volume)
+            pygame.mixer.music.play(loops=-1)
+        self.music = path
+
+    def stats(self):
+        busy = sum(channel.get_busy() for channel in self.channels)
+        return {"channels": len(self.channels), "busy": busy, "sounds": len(self.sounds), "music": self.music,
+                "played": self.played, "limited": self.limited, "stolen": self.stolen}
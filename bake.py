@@ -0,0 +1,38 @@
+from game import Game
+from level import Level
+from scenes import SCENES
+from assets import assets
+from bundle import write_bundle, DEFAULT_BUNDLE
+import argparse
+import glob
+import sys
+import os
+
+def bake(output=DEFAULT_BUNDLE, levels="levels/*.json"):
+    # Load everything the game can ask for from the raw files (every scene and every level's
+    # images, the sprites and sound effects) and write it all to one bundle
+    game = Game(headless=True, bundle_path=None)
+    for name in SCENES:
+        game.scenes.get(name)
+    for path in sorted(glob.glob(levels)):
+        level = Level(path)
+        for layer in level.layers:
+            assets.image(layer)
+        if level.walls:
+            assets.image(level.walls)
+        for tile in level.legend.values():
+            if "image" in tile:
+                assets.image(tile["image"], (level.tile_size, level.tile_size))
+    return write_bundle(output, assets.images, assets.masks, assets.sounds)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bake the Battle City images, masks and sounds into one asset bundle")
+    parser.add_argument("--output", default=DEFAULT_BUNDLE, help=f"bundle file, {DEFAULT_BUNDLE} by default")
+    parser.add_argument("--levels", default="levels/*.json", help="glob of the level files whose images are baked")
+    args = parser.parse_args(argv)
+    count = bake(args.output, args.levels)
+    print(f"{count} assets, {os.path.getsize(args.output)} bytes in {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,217 @@
+from game import Game
+from assets import assets, BULLET_SPRITE, COIN_SPRITE
+from enemy import ENEMY_SPRITES
+from input_source import ScriptedInput, key_event
+from text import text_cache
+import snapshot
+import tracemalloc
+import pickle
+import platform
+import argparse
+import random
+import pygame
+import json
+import time
+import sys
+
+# Bullet directions used to populate the stress scene, spawn regions come from the level
+DIRECTIONS = [(2, 0), (-2, 0), (0, 2), (0, -2), (2, 2), (2, -2), (-2, 2), (-2, -2)]
+MOVES = [pygame.K_RIGHT, pygame.K_DOWN, pygame.K_LEFT, pygame.K_UP]
+
+def player_script(tick):
+    # Walk in a square, changing direction every second, and shoot every 10 ticks
+    held = [MOVES[(tick // 60) % len(MOVES)]]
+    events = [key_event(pygame.K_SPACE)] if tick % 10 == 9 else []
+    return events, held
+
+class Benchmark:
+    def __init__(self, enemies=8, bullets=0, coins=0, draw=True, entity_store=False, seed=0, level=None,
+                 ai_budget_us=2000):
+        random.seed(seed)
+        self.enemies = enemies
+        self.bullets = bullets
+        self.coins = coins
+        self.draw = draw
+        # Pools sized so the configured counts fit next to the shots and spawns of normal play
+        self.game = Game(headless=True, input_source=ScriptedInput(player_script),
+                         max_bullets=bullets + 256, max_coins=coins + 32, seed=seed, level_path=level,
+                         ai_budget_us=ai_budget_us)
+        if entity_store:
+            self.game.enable_entity_store()
+        self.game.change_scene("playing")
+        self.game.player.health = float("inf")  # The stress scene must not end in GameOver
+        self.scene = self.game.current_scene
+
+    def populate(self):
+        # Top the scene up to the configured enemy, bullet and coin counts
+        game, scene = self.game, self.scene
+        while len(scene.enemies) + len(game.scheduler.pending("respawn")) < self.enemies:
+            entry = random.choice(game.level.roster)
+            position = scene.get_random_valid_position(*game.level.spawn_zones[entry["zone"]], ENEMY_SPRITES[entry["type"]])
+            if position is None:
+                break
+            scene.spawn_enemy(entry["type"], entry["health"], position)
+
+        field = game.level.spawn_zones["coins"]
+        bullet_index = game.spawn_index(BULLET_SPRITE, field)
+        live_bullets = len(game.bullet_store) if game.bullet_store is not None else len(game.bullets)
+        for _ in range(self.bullets - live_bullets):
+            position = bullet_index.sample()
+            if position is None:
+                break
+            x, y = position
+            dx, dy = random.choice(DIRECTIONS)
+            if game.bullet_store is not None:
+                game.bullet_store.add(x, y, dx, dy, health=10)
+            else:
+                game.bullets.acquire().reset(x, y, dx, dy)
+
+        coin_index = game.spawn_index(COIN_SPRITE, field)
+        for _ in range(self.coins - len(game.coins)):
+            position = coin_index.sample([coin.get_rect() for coin in game.coins])
+            if position is None:
+                break
+            game.coins.acquire().reset(*position)
+
+    def tick(self):
+        self.game.update()
+        if self.draw:
+            self.game.render(1.0)
+
+    def run(self, ticks, allocation_ticks=200):
+        game = self.game
+        for _ in range(10):  # Warm up caches and the flow field before measuring
+            self.populate()
+            self.tick()
+
+        game.profiler.reset()
+        game.profiler.enabled = True
+        assets.reset_stats()
+        elapsed = 0.0
+        for _ in range(ticks):
+            self.populate()  # Refilling is setup work and stays out of the measurement
+            start = time.perf_counter()
+            self.tick()
+            elapsed += time.perf_counter() - start
+        game.profiler.enabled = False
+
+        sections = {}
+        for name, seconds in sorted(game.profiler.totals.items()):
+            sections[name] = {
+                "total_ms": seconds * 1000,
+                "per_tick_ms": seconds * 1000 / ticks,
+                "calls": game.profiler.calls[name],
+            }
+
+        return {
+            "config": {
+                "ticks": ticks,
+                "enemies": self.enemies,
+                "bullets": self.bullets,
+                "coins": self.coins,
+                "draw": self.draw,
+                "entity_store": game.bullet_store is not None,
+                "level": game.level.path,
+                "ai_budget_us": game.ai.budget_us,
+            },
+            "ticks_per_sec": ticks / elapsed if elapsed else 0.0,
+            "mean_tick_ms": elapsed * 1000 / ticks,
+            "sections": sections,
+            "allocations": self.measure_allocations(allocation_ticks),
+            "snapshot": self.measure_snapshots(),
+            "assets": assets.stats(),
+            "text": text_cache.stats(),
+            "audio": game.audio.stats(),
+            "ai": game.ai.stats(),
+            "pools": {"bullets": game.bullets.stats(), "coins": game.coins.stats()},
+        }
+
+    def measure_snapshots(self, repeats=200):
+        # Throughput of capturing and restoring the current state, e.g. for rollback or search
+        game = self.game
+        start = time.perf_counter()
+        for _ in range(repeats):
+            state = snapshot.capture(game)
+        captured = time.perf_counter()
+        for _ in range(repeats):
+            snapshot.restore(game, state)
+        restored = time.perf_counter()
+        return {
+            "capture_us": (captured - start) * 1e6 / repeats,
+            "restore_us": (restored - captured) * 1e6 / repeats,
+            "bytes": len(pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)),
+        }
+
+    def measure_allocations(self, ticks):
+        # Separate traced pass, tracemalloc slows the game down too much to share the timed one
+        if ticks <= 0:
+            return None
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        for _ in range(ticks):
+            self.populate()
+            self.tick()
+        after = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        stats = after.compare_to(before, "filename")
+        return {
+            "ticks": ticks,
+            "net_bytes": sum(stat.size_diff for stat in stats),
+            "net_blocks": sum(stat.count_diff for stat in stats),
+            "peak_bytes": peak,
+        }
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless Battle City game loop benchmark")
+    parser.add_argument("--ticks", type=int, default=1000)
+    parser.add_argument("--enemies", type=int, default=8)
+    parser.add_argument("--bullets", type=int, default=0)
+    parser.add_argument("--coins", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--level", help="level file, levels/arena.json by default")
+    parser.add_argument("--no-draw", action="store_true", help="skip rendering")
+    parser.add_argument("--ai-budget", type=int, default=2000, help="enemy AI microseconds per tick, 0 for no limit")
+    parser.add_argument("--entity-store", action="store_true", help="keep bullets and enemies in the numpy entity stores")
+    parser.add_argument("--allocation-ticks", type=int, default=200, help="ticks of the traced allocation pass, 0 to skip")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare ticks/sec against")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="allowed ticks/sec slowdown against the baseline")
+    args = parser.parse_args(argv)
+
+    benchmark = Benchmark(args.enemies, args.bullets, args.coins, not args.no_draw, args.entity_store, args.seed,
+                          args.level, args.ai_budget or None)
+    results = benchmark.run(args.ticks, args.allocation_ticks)
+    results["environment"] = environment()
+
+    print(f"{results['ticks_per_sec']:.1f} ticks/sec, {results['mean_tick_ms']:.3f} ms/tick")
+    for name, section in results["sections"].items():
+        print(f"  {name:<10} {section['per_tick_ms']:.3f} ms/tick")
+    snap = results["snapshot"]
+    print(f"snapshot {snap['capture_us']:.1f} us capture, {snap['restore_us']:.1f} us restore, {snap['bytes']} bytes")
+    ai = results["ai"]
+    print(f"ai {ai['mean_used_us']:.1f} us mean, {ai['max_used_us']:.1f} us max per tick of a {ai['budget_us']} us budget")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        change = results["ticks_per_sec"] / baseline["ticks_per_sec"] - 1
+        print(f"{change:+.1%} ticks/sec against {args.baseline}")
+        if change < -args.tolerance:
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,7 @@
 from point import Point
-from coin import Coin
+from assets import assets, BULLET_SPRITE
+from sweep import first_blocked, first_overlap
 import pygame
-import time
 
 class Bullet:
     def __init__(self, game, damage, position: Point, direction: Point):
@@ -10,44 +10,54 @@ class Bullet:
         self.damage = damage
         self.position = position
         self.direction = direction
-        self.image = pygame.image.load('images/bullet.png')
-        self.image = pygame.transform.scale(self.image, (15, 15))
-        self.mask = pygame.mask.from_surface(self.image)
+        self.sprite = BULLET_SPRITE
+        self.image = assets.image(*self.sprite)
+        self.mask = assets.mask(*self.sprite)
 
-    def move(self, game):
-        # Move the bullet in its current direction
-        new_x = self.position.getX() + self.direction.getX() * 2  # Bullet speed
-        new_y = self.position.getY() + self.direction.getY() * 2
-
-        min_x, min_y = 8, 60
-        max_x, max_y = 462.8 - 15, 485 - 15
+    def reset(self, x, y, direction_x, direction_y):
+        # Reuse a pooled bullet for a new shot without allocating
+        self.position.setX(x)
+        self.position.setY(y)
+        self.direction.setX(direction_x)
+        self.direction.setY(direction_y)
 
-        # Check if the new position is within borders and does not collide with limit area
-        if min_x <= new_x <= max_x and min_y <= new_y <= max_y and not game.check_collision(new_x, new_y):
-            self.position.setX(new_x)
-            self.position.setY(new_y)
-        else:
-            game.bullets.remove(self) # Remove the bullet if it goes out of borders or collides with enemy
+    def move(self, game):
+        # Move the bullet in its current direction for one tick. The whole path is swept, so the
+        # earliest hit counts at any bullet speed: an enemy takes the damage, a border or the edge of
+        # the play field just stops the bullet. Returns False when the bullet was spent and released.
+        x, y = self.position.getX(), self.position.getY()
+        dx, dy = self.direction.getX() * game.bullet_speed, self.direction.getY() * game.bullet_speed
+        wall_step = first_blocked(game.collision_map, self.sprite, x, y, dx, dy)
+        width, height = self.sprite[1]
+        path = pygame.Rect(min(x, x + dx), min(y, y + dy), width + abs(dx), height + abs(dy))
+        candidates = game.collision_grid.query(path, "enemy")
+        enemy = self.first_enemy_hit(candidates, x, y, dx, dy, wall_step)[0] if candidates else None  # Most paths meet no enemy
+        if enemy is not None:
+            self.game.hit_enemy(enemy, self.damage) # Decrease enemy's health by bullet's damage
+        if enemy is not None or wall_step is not None:
+            game.bullets.release(self)
+            return False
+        self.position.setX(x + dx)
+        self.position.setY(y + dy)
+        return True
+
+    def get_rect(self):
+        # Bounding rectangle of the bullet at its current position
+        return pygame.Rect(self.position.getX(), self.position.getY(), *self.sprite[1])
 
     def draw(self, screen):
         # Draw the bullet on the screen
         screen.blit(self.image, (self.position.getX(), self.position.getY()))
 
-    def check_collision(self, enemies):
-        # Check collision between the bullet and enemies
-        for enemy in enemies[:]: # Iterate through a copy of enemies list to safely modify original list
-            offset = (enemy.position.getX() - self.position.getX(), enemy.position.getY() - self.position.getY())
-            # Check if bullet's mask overlaps with enemy's mask
-            if self.mask.overlap(enemy.mask, offset):
-                enemy.health = enemy.health - self.damage # Decrease enemy's health by bullet's damage
-                if enemy.health <= 0:
-                    respawn_time = time.time() + 3  # Set the respawn time to 3 seconds later
-                    self.game.removed_enemies.append((enemy, respawn_time))
-                    enemies.remove(enemy)
-
-                    # Add 5 coins to collected_coins for removing one enemy
-                    for _ in range(5):
-                        self.game.collected_coins.append(Coin(enemy.position))
-
-                return True
-        return False
\ No newline at end of file
+    def first_enemy_hit(self, candidates, x, y, dx, dy, wall_step=None):
+        # Enemy of candidates (the broadphase query of the swept box) the bullet hits first on its way
+        # from (x, y) by (dx, dy), before the wall at wall_step, as (enemy, step) or (None, None).
+        # Masks are only tested where the bounding boxes meet.
+        limit = None if wall_step is None else wall_step - 1  # A wall hit in the same step wins
+        hit, hit_step = None, None
+        for enemy in candidates:
+            step = first_overlap(self.mask, x, y, dx, dy, enemy.mask, enemy.position.getX(), enemy.position.getY(),
+                                 enemy.get_rect(), limit)
+            if step is not None:
+                hit, hit_step, limit = enemy, step, step - 1
+        return hit, hit_step
\ No newline at end of file
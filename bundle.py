@@ -0,0 +1,123 @@
+import pygame
+import struct
+import mmap
+import json
+import os
+
+# Bundle layout: header, JSON index, then the raw data of every entry. Images are stored scaled and
+# in the display's pixel format (BGRA), masks as RGBA alpha, sounds as decoded samples in the
+# mixer format they were baked with. Written by bake.py.
+MAGIC = b"BCAB"
+VERSION = 1
+HEADER = struct.Struct("<4sHI")  # magic, version, index length
+IMAGE_FORMAT = "BGRA"
+IMAGE_MASKS = (0xff0000, 0xff00, 0xff)  # RGB masks of IMAGE_FORMAT surfaces
+DEFAULT_BUNDLE = "assets.bundle"
+
+def source_stamp(path):
+    # Cheap staleness check of a source file: its size and modification time
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+def write_bundle(path, images, masks, sounds):
+    # images and masks map (path, size) to surfaces and masks, sounds map paths to pygame Sounds
+    entries, blobs, offset = [], [], 0
+    def add(entry, data):
+        nonlocal offset
+        entry.update(offset=offset, length=len(data), source=source_stamp(entry["path"]))
+        entries.append(entry)
+        blobs.append(data)
+        offset += len(data)
+    for (source, size), image in images.items():
+        add({"type": "image", "path": source, "size": size, "dims": image.get_size()},
+            pygame.image.tobytes(image, IMAGE_FORMAT))
+    for (source, size), mask in masks.items():
+        surface = mask.to_surface(setcolor=(255, 255, 255, 255), unsetcolor=(0, 0, 0, 0))
+        add({"type": "mask", "path": source, "size": size, "dims": mask.get_size()},
+            pygame.image.tobytes(surface, "RGBA"))
+    mixer = pygame.mixer.get_init()
+    for source, sound in sounds.items():
+        add({"type": "sound", "path": source, "mixer": mixer}, sound.get_raw())
+
+    index = json.dumps({"pygame": pygame.version.ver, "entries": entries}).encode()
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, len(index)))
+        file.write(index)
+        for blob in blobs:
+            file.write(blob)
+    os.replace(temporary, path)  # A running game never maps a half-written bundle
+    return len(entries)
+
+class AssetBundle:
+    def __init__(self, file, data, index, start):
+        # Entries are looked up by (type, path, size) and built straight from the mapped file,
+        # each one only if its source file is unchanged since the bake
+        self.file = file
+        self.data = data
+        self.start = start
+        self.entries = {}
+        for entry in index["entries"]:
+            size = tuple(entry["size"]) if entry.get("size") else None
+            self.entries[(entry["type"], entry["path"], size)] = entry
+        self.stale = 0
+
+    def entry(self, kind, path, size=None):
+        entry = self.entries.get((kind, path, size))
+        if entry is None:
+            return None
+        try:
+            fresh = source_stamp(path) == entry["source"]
+        except OSError:
+            fresh = True  # Source missing, the baked copy is all there is
+        if not fresh:
+            self.stale += 1
+            return None
+        return entry
+
+    def buffer(self, entry):
+        begin = self.start + entry["offset"]
+        return memoryview(self.data)[begin:begin + entry["length"]]
+
+    def image(self, path, size=None):
+        entry = self.entry("image", path, size)
+        if entry is None:
+            return None
+        # Shares the mapped pages; converted only when the display uses another pixel layout
+        image = pygame.image.frombuffer(self.buffer(entry), tuple(entry["dims"]), IMAGE_FORMAT)
+        display = pygame.display.get_surface()
+        if display is not None and display.get_masks()[:3] != IMAGE_MASKS:
+            image = image.convert_alpha()
+        return image
+
+    def mask(self, path, size=None):
+        entry = self.entry("mask", path, size)
+        if entry is None:
+            return None
+        return pygame.mask.from_surface(pygame.image.frombuffer(self.buffer(entry), tuple(entry["dims"]), "RGBA"))
+
+    def sound(self, path):
+        entry = self.entry("sound", path)
+        if entry is None or tuple(entry["mixer"]) != pygame.mixer.get_init():
+            return None  # Samples of another mixer format would play at the wrong pitch or width
+        return pygame.mixer.Sound(buffer=self.buffer(entry))
+
+def load_bundle(path=DEFAULT_BUNDLE):
+    # Map the bundle at path; None when it is missing, damaged or from another format or pygame version
+    try:
+        file = open(path, "rb")
+    except OSError:
+        return None
+    try:
+        # Copy-on-write mapping: surfaces built on it stay writable without touching the file
+        data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY)
+        magic, version, length = HEADER.unpack_from(data)
+        index = json.loads(data[HEADER.size:HEADER.size + length])
+    except (OSError, ValueError, struct.error):
+        file.close()
+        return None
+    if magic != MAGIC or version != VERSION or index.get("pygame") != pygame.version.ver:
+        data.close()
+        file.close()
+        return None
+    return AssetBundle(file, data, index, HEADER.size + length)
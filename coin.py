@@ -1,13 +1,23 @@
 from point import Point
+from assets import assets, COIN_SPRITE
 import pygame
 
 class Coin:
     def __init__(self, position: Point):
         # Initialize a Coin object with a given position
         self.position = position
-        self.image = pygame.image.load('images/coin.png')
-        self.image = pygame.transform.scale(self.image, (20, 20))
-        self.mask = pygame.mask.from_surface(self.image) # Create a mask for collision detection
+        self.sprite = COIN_SPRITE
+        self.image = assets.image(*self.sprite)
+        self.mask = assets.mask(*self.sprite) # Shared mask for collision detection
+
+    def reset(self, x, y):
+        # Reuse a pooled coin at a new position
+        self.position.setX(x)
+        self.position.setY(y)
+
+    def get_rect(self):
+        # Bounding rectangle of the coin at its current position
+        return pygame.Rect(self.position.getX(), self.position.getY(), *self.sprite[1])
 
     def draw(self, screen):
         # Draw the coin on the screen
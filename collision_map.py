@@ -0,0 +1,37 @@
+import pygame
+
+class CollisionMap:
+    def __init__(self, borders_mask, sprite_masks, bounds=None):
+        # Configuration space of the static borders: for every sprite footprint a bit mask over the
+        # whole field with bit (x, y) set when the sprite placed with its top-left corner at (x, y)
+        # overlaps the borders or sticks out of bounds (min_x, min_y, max_x, max_y, the play field).
+        # Built once, after that every walkability test is a single bit lookup.
+        self.borders_mask = borders_mask
+        self.width, self.height = borders_mask.get_size()
+        self.bounds = bounds or (0, 0, self.width, self.height)
+        self.blocked = {}
+        for sprite, mask in sprite_masks.items():
+            self.add_footprint(sprite, mask)
+
+    def add_footprint(self, sprite, mask):
+        # Convolving the borders with the sprite mask marks every offset at which the two overlap
+        width, height = mask.get_size()
+        blocked = pygame.mask.Mask((self.width, self.height))
+        self.borders_mask.convolve(mask, blocked, (-(width - 1), -(height - 1)))
+
+        # Offsets where the sprite's box leaves the bounds are blocked as well
+        min_x, min_y, max_x, max_y = self.bounds
+        inside = (max_x - width - min_x + 1, max_y - height - min_y + 1)
+        outside = pygame.mask.Mask((self.width, self.height), fill=True)
+        if inside[0] > 0 and inside[1] > 0:
+            outside.erase(pygame.mask.Mask(inside, fill=True), (min_x, min_y))
+        blocked.draw(outside, (0, 0))
+        self.blocked[sprite] = blocked
+        return blocked
+
+    def collides(self, sprite, x, y):
+        # True if the sprite at top-left (x, y) overlaps the borders; positions off the field are blocked
+        x, y = int(x), int(y)
+        if x < 0 or y < 0 or x >= self.width or y >= self.height:
+            return True
+        return self.blocked[sprite].get_at((x, y)) == 1
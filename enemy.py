@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
 from point import Point
+from assets import assets, BASIC_ENEMY_SPRITE, ADVANCED_ENEMY_SPRITE
 import pygame
 
 class EnemyFactory:
@@ -15,10 +16,12 @@ class Enemy(ABC):
         self.health = health
         self.initial_health = health  # Store the initial health
         self.position = position
-        self.image = pygame.image.load(image_path)
-        self.image = pygame.transform.scale(self.image, (25, 25))
-        self.mask = pygame.mask.from_surface(self.image)
+        self.sprite = (image_path, (25, 25))
+        self.image = assets.image(*self.sprite)
+        self.mask = assets.mask(*self.sprite)
         self.damage_on_collision = damage_on_collision
+        self.heading = (0, 0)  # Step of the last think, followed between thinks
+        self.next_think = 0    # AIScheduler tick the enemy is due to think again
 
     @abstractmethod
     def move(self, game):
@@ -28,52 +31,70 @@ class Enemy(ABC):
     def check_collision_with_player(self, player):
         pass
 
+    def get_rect(self):
+        # Bounding rectangle of the enemy at its current position
+        return pygame.Rect(self.position.getX(), self.position.getY(), *self.sprite[1])
+
     def move_towards_player(self, game, step_size):
-        # Moves the enemy towards the player based on step size
-        player_pos = game.player.position
-        dir_x = player_pos.getX() - self.position.getX()
-        dir_y = player_pos.getY() - self.position.getY()
+        # Moves the enemy towards the player based on step size, following the game's flow field
+        # around the borders and heading straight for the player once in the player's cell
+        x, y = self.position.getX(), self.position.getY()
+        target = game.flow_field.next_waypoint(x, y)
+        if target is None:
+            target = (game.player.position.getX(), game.player.position.getY())
 
-        step_x = 1 if dir_x > 0 else -1
-        step_y = 1 if dir_y > 0 else -1
+        step_x = (target[0] > x) - (target[0] < x)
+        step_y = (target[1] > y) - (target[1] < y)
+        self.heading = self.step(game, step_x, step_y, step_size)
 
-        new_x = self.position.getX() + step_x * step_size
-        new_y = self.position.getY() + step_y * step_size
+    def glide(self, game, step_size):
+        # Keep going along the heading of the last think, without asking the flow field
+        self.step(game, *self.heading, step_size)
 
-        min_x, min_y = 75, 125
-        max_x, max_y = 583 - 25, 546 - 25
+    def step(self, game, step_x, step_y, step_size):
+        # Try the diagonal step first, then slide along either axis; returns the step taken
+        x, y = self.position.getX(), self.position.getY()
+        for dx, dy in ((step_x, step_y), (step_x, 0), (0, step_y)):
+            if dx == 0 and dy == 0:
+                continue
+            new_x = x + dx * step_size
+            new_y = y + dy * step_size
+            if self.can_move_to(game, new_x, new_y):
+                self.position.setX(new_x)
+                self.position.setY(new_y)
+                return dx, dy
+        return 0, 0
 
-        # Check boundaries and collisions
-        if min_x <= new_x <= max_x and min_y <= new_y <= max_y and not game.check_collision(new_x, new_y):
-            self.position.setX(new_x)
-            self.position.setY(new_y)
+    def can_move_to(self, game, new_x, new_y):
+        # The collision map covers both the borders and the level's play field bounds
+        return not game.check_collision(new_x, new_y, self.sprite)
 
     def check_collision_with_player(self, player):
+        # Only tests for contact, the damage is applied once through Game.hurt_player by the caller
+        if not self.get_rect().colliderect(player.get_rect()):
+            return False # Bounding boxes apart, skip the mask test
         offset = (player.position.getX() - self.position.getX(), player.position.getY() - self.position.getY())
-        if self.mask.overlap(player.mask, offset):
-            player.decrease_health(10)
-            return True
-        return False
+        return self.mask.overlap(player.mask, offset) is not None
 
 class BasicEnemy(Enemy):
+    kind = "basic"  # EnemyFactory type name
+
     def __init__(self, health, position):
-        super().__init__(health, position, 'images/enemy_pc.png', 10)
+        super().__init__(health, position, BASIC_ENEMY_SPRITE[0], 10)
 
     def move(self, game):
         # Move method to move BasicEnemy towards the player
         self.move_towards_player(game, 1)
-        # Check collision with player
-        if self.check_collision_with_player(game.player):
-            game.player.decrease_health(10)
 
 class AdvancedEnemy(Enemy):
+    kind = "advanced"
+
     def __init__(self, health, position):
-        super().__init__(health, position, 'images/enemy_pc_adv.png', 50)
+        super().__init__(health, position, ADVANCED_ENEMY_SPRITE[0], 50)
 
     def move(self, game):
         # Move method to move AdvancedEnemy towards the player
         self.move_towards_player(game, 1)
 
-        # Check collision with player
-        if self.check_collision_with_player(game.player):
-            game.player.decrease_health(10)
\ No newline at end of file
+# Sprite of each EnemyFactory type, for spawn checks before the enemy exists
+ENEMY_SPRITES = {"basic": BASIC_ENEMY_SPRITE, "advanced": ADVANCED_ENEMY_SPRITE}
\ No newline at end of file
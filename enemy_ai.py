@@ -0,0 +1,113 @@
+from profiler import RingBuffer
+from entity_store import np
+import time
+
+CHUNK = 64  # Enemies thinking in one batch of an enemy store, the budget is checked between batches
+
+# Think interval in ticks by distance to the player: (max distance in pixels, ticks), nearest first
+DEFAULT_LOD = [(96, 1), (200, 3), (float("inf"), 6)]
+
+class AIScheduler:
+    def __init__(self, budget_us=2000, lod=None, history=600):
+        # Splits enemy thinking (flow field lookup and a fresh heading) across ticks. An enemy is due
+        # to think every few ticks depending on its distance to the player (lod); due enemies think in
+        # round-robin order until budget_us microseconds of the tick are used, the rest stay due for
+        # the next tick. Between thinks every enemy keeps moving along its last heading, so far enemies
+        # move as smoothly as near ones. budget_us=None thinks for every due enemy, which keeps the
+        # simulation deterministic (recordings and replays).
+        self.budget_us = budget_us
+        self.lod = lod or DEFAULT_LOD
+        self.tick = 0
+        self.cursor = 0          # Enemy index the next tick's thinking starts from
+        self.thinks = 0          # Thinks of the last tick
+        self.deferred = 0        # Due enemies left for the next tick by the budget
+        self.used = RingBuffer(history)  # Microseconds spent thinking per tick
+
+    def interval(self, enemy, player_x, player_y):
+        distance = abs(enemy.position.getX() - player_x) + abs(enemy.position.getY() - player_y)
+        for limit, ticks in self.lod:
+            if distance <= limit:
+                return ticks
+        return self.lod[-1][1]
+
+    def update(self, game, enemies):
+        # One tick of enemy AI: think for the due enemies within the budget, glide the others, then
+        # damage the player once for every enemy touching it
+        self.tick += 1
+        player = game.player
+        player_x, player_y = player.position.getX(), player.position.getY()
+        start = time.perf_counter()
+        deadline = None if self.budget_us is None else start + self.budget_us / 1e6
+        if game.enemy_store is not None:
+            self.update_store(game, enemies, player_x, player_y, deadline)
+        else:
+            self.update_objects(game, enemies, player_x, player_y, deadline)
+        self.used.append((time.perf_counter() - start) * 1e6)
+
+        # The grid is from the start of the tick, enemies moved at most a pixel since
+        for enemy in game.collision_grid.query(player.get_rect().inflate(2, 2), "enemy"):
+            if enemy.check_collision_with_player(player):
+                game.hurt_player(10)
+
+    def update_objects(self, game, enemies, player_x, player_y, deadline):
+        # Enemy objects one at a time, in round-robin order from the cursor
+        count = len(enemies)
+        thinks = deferred = 0
+        cursor = self.cursor if self.cursor < count else 0
+        resume = None
+        for offset in range(count):
+            index = (cursor + offset) % count
+            enemy = enemies[index]
+            if enemy.next_think <= self.tick:
+                if deadline is None or time.perf_counter() < deadline:
+                    enemy.move(game)
+                    enemy.next_think = self.tick + self.interval(enemy, player_x, player_y)
+                    thinks += 1
+                    continue
+                if resume is None:
+                    resume = index  # First enemy left waiting goes first next tick
+                deferred += 1
+            enemy.glide(game, 1)
+        self.cursor = resume if resume is not None else cursor
+        self.thinks = thinks
+        self.deferred = deferred
+
+    def update_store(self, game, enemies, player_x, player_y, deadline):
+        # Same round robin over the rows of an enemy store: due enemies aim in batches of CHUNK while
+        # the budget lasts, then everyone steps at once, the others along their heading
+        store = game.enemy_store
+        count = len(enemies)
+        cursor = self.cursor if self.cursor < count else 0
+        rows = np.roll(store.rows(enemies), -cursor)  # Round-robin order, from the cursor on
+        due = np.flatnonzero(store.next_think[rows] <= self.tick)
+        step_x, step_y = store.dx[rows], store.dy[rows]
+        thought = len(due)
+        size = CHUNK if deadline is not None else max(len(due), 1)  # Without a budget all of them in one batch
+        for begin in range(0, len(due), size):
+            if deadline is not None and time.perf_counter() >= deadline:
+                thought = begin
+                break
+            chunk = due[begin:begin + size]
+            step_x[chunk], step_y[chunk] = store.aim(rows[chunk], game.flow_field, player_x, player_y)
+        taken_x, taken_y = store.step(rows, step_x, step_y, 1)
+        thinking = due[:thought]
+        thinkers = rows[thinking]
+        store.dx[thinkers], store.dy[thinkers] = taken_x[thinking], taken_y[thinking]
+        store.next_think[thinkers] = self.tick + self.intervals(store.x[thinkers], store.y[thinkers], player_x, player_y)
+        self.cursor = (cursor + int(due[thought])) % count if thought < len(due) else cursor  # First enemy left waiting
+        self.thinks = thought
+        self.deferred = len(due) - thought
+
+    def intervals(self, x, y, player_x, player_y):
+        # interval() for arrays of positions
+        distance = np.abs(x - player_x) + np.abs(y - player_y)
+        ticks = np.full(len(distance), self.lod[-1][1])
+        for limit, interval in reversed(self.lod):
+            ticks[distance <= limit] = interval  # Nearer limits are applied last and win
+        return ticks
+
+    def stats(self):
+        used = list(self.used)
+        mean = sum(used) / len(used) if used else 0.0
+        return {"budget_us": self.budget_us, "used_us": used[-1] if used else 0.0, "mean_used_us": mean,
+                "max_used_us": max(used, default=0.0), "thinks": self.thinks, "deferred": self.deferred}
@@ -0,0 +1,143 @@
+from entity_store import EntityStore, EntityView, mask_to_array, np
+from enemy import Enemy, ENEMY_SPRITES
+from assets import assets
+from navigation import NEIGHBOURS
+
+class EnemyView(EntityView):
+    # An enemy kept in a row of an EnemyStore, with the attributes and collision methods of Enemy,
+    # so the scene list, bullets, the collision grid, drawing and snapshots treat it like one
+    get_rect = Enemy.get_rect
+    check_collision_with_player = Enemy.check_collision_with_player
+
+    @property
+    def kind(self):
+        return self.store.kinds[self.store.kind[self.index]]
+
+    @property
+    def sprite(self):
+        return ENEMY_SPRITES[self.kind]
+
+    @property
+    def image(self):
+        return self.store.images[self.store.kind[self.index]]
+
+    @property
+    def mask(self):
+        return self.store.masks[self.store.kind[self.index]]
+
+    @property
+    def health(self):
+        return int(self.store.health[self.index])
+
+    @health.setter
+    def health(self, health):
+        self.store.health[self.index] = health
+
+    @property
+    def initial_health(self):
+        return int(self.store.initial_health[self.index])
+
+    @initial_health.setter
+    def initial_health(self, health):
+        self.store.initial_health[self.index] = health
+
+    @property
+    def heading(self):
+        return int(self.store.dx[self.index]), int(self.store.dy[self.index])
+
+    @heading.setter
+    def heading(self, heading):
+        self.store.dx[self.index], self.store.dy[self.index] = heading
+
+    @property
+    def next_think(self):
+        return int(self.store.next_think[self.index])
+
+    @next_think.setter
+    def next_think(self, tick):
+        self.store.next_think[self.index] = tick
+
+class EnemyStore(EntityStore):
+    fields = dict(EntityStore.fields, initial_health="int32", next_think="int64")
+
+    def __init__(self, collision_map, capacity=64):
+        # Enemies as rows: position, heading (dx, dy), health, kind and the AIScheduler columns. Rows stay
+        # put for the whole session, a killed enemy keeps its row for the respawn. Thinking and gliding
+        # run for many rows at once, with the same flow field lookup and wall slides as Enemy.
+        # Columns beyond EntityStore's: initial_health, and the tick the enemy next thinks at.
+        super().__init__(capacity)
+        self.kinds = list(ENEMY_SPRITES)
+        self.images = [assets.image(*ENEMY_SPRITES[kind]) for kind in self.kinds]
+        self.masks = [assets.mask(*ENEMY_SPRITES[kind]) for kind in self.kinds]
+        # Blocked top-left positions of every kind, indexed [kind, y, x]
+        self.walls = np.stack([mask_to_array(collision_map.blocked[ENEMY_SPRITES[kind]]) for kind in self.kinds])
+        self.flow_version = None  # Flow field distances last padded for waypoints()
+
+    def add_enemy(self, kind, health, x, y, view=None):
+        # New row for an enemy of the EnemyFactory type kind, returns its view (view, moved to the row, if given)
+        index = self.add(x, y, 0, 0, health, self.kinds.index(kind))
+        self.initial_health[index] = health
+        self.next_think[index] = 0
+        if view is None:
+            return EnemyView(self, index)
+        view.index = index
+        return view
+
+    def rows(self, enemies):
+        # Rows of the given views, in their order
+        return np.fromiter((enemy.index for enemy in enemies), dtype=np.intp, count=len(enemies))
+
+    def aim(self, rows, flow_field, player_x, player_y):
+        # The thinking half of Enemy.move_towards_player for every row: the unit step towards the best
+        # neighbouring flow field cell, or straight towards the player when in its cell or cut off from it
+        x, y = self.x[rows], self.y[rows]
+        target_x, target_y = self.waypoints(flow_field, x, y)
+        found = target_x >= 0
+        target_x = np.where(found, target_x, player_x)
+        target_y = np.where(found, target_y, player_y)
+        return np.sign(target_x - x), np.sign(target_y - y)
+
+    def step(self, rows, step_x, step_y, step_size):
+        # Enemy.step for every row: the diagonal first, then either axis; returns the steps taken.
+        # Thinking enemies pass their aim, gliding ones their heading.
+        x, y, kind = self.x[rows], self.y[rows], self.kind[rows]
+        _, height, width = self.walls.shape
+        zero = np.zeros_like(step_x)
+        tries_x = np.stack((step_x, step_x, zero), axis=1)
+        tries_y = np.stack((step_y, zero, step_y), axis=1)
+        new_x, new_y = x[:, None] + tries_x * step_size, y[:, None] + tries_y * step_size
+        inside = (new_x >= 0) & (new_y >= 0) & (new_x < width) & (new_y < height)  # Off the field is blocked
+        free = inside & ~self.walls[kind[:, None], np.clip(new_y, 0, height - 1), np.clip(new_x, 0, width - 1)]
+        free &= (tries_x != 0) | (tries_y != 0)
+        first = np.argmax(free, axis=1)
+        moved = free[np.arange(len(rows)), first]
+        taken_x = np.where(moved, tries_x[np.arange(len(rows)), first], 0)
+        taken_y = np.where(moved, tries_y[np.arange(len(rows)), first], 0)
+        self.x[rows] = x + taken_x * step_size
+        self.y[rows] = y + taken_y * step_size
+        return taken_x, taken_y
+
+    def waypoints(self, flow_field, x, y):
+        # FlowField.next_waypoint for every position, -1 where there is none
+        columns, rows, cell_size = flow_field.columns, flow_field.rows, flow_field.cell_size
+        if self.flow_version != (flow_field, flow_field.recomputes):
+            # The distances with a border of unreachable cells, so no neighbour lookup leaves the array
+            padded = np.full((rows + 2, columns + 2), -1, dtype=np.int32)
+            padded[1:-1, 1:-1] = np.frombuffer(flow_field.distance, dtype=np.int32).reshape(rows, columns)
+            self.flow_distance = padded.ravel()
+            self.flow_offsets = np.array([dy * (columns + 2) + dx for dx, dy in NEIGHBOURS])
+            self.flow_version = (flow_field, flow_field.recomputes)
+        distance = self.flow_distance
+        column, row = x // cell_size, y // cell_size
+        on_grid = (column >= 0) & (column < columns) & (row >= 0) & (row < rows)
+        cell = np.where(on_grid, (row + 1) * (columns + 2) + column + 1, 0)
+        best = np.where(on_grid, distance[cell], 0)  # Off the grid and in the target cell there is no waypoint
+        best = np.where(best == -1, columns * rows, best)  # Cell the box does not fit, any reachable neighbour will do
+        values = distance[cell[:, None] + self.flow_offsets]
+        values = np.where(values == -1, columns * rows, values)
+        nearest = np.argmin(values, axis=1)  # First of the equally near ones, as the NEIGHBOURS order prefers
+        found = values[np.arange(len(cell)), nearest] < best
+        offsets = np.array(NEIGHBOURS)[nearest]
+        waypoint_x = np.where(found, (column + offsets[:, 0]) * cell_size, -1)
+        waypoint_y = np.where(found, (row + offsets[:, 1]) * cell_size, -1)
+        return waypoint_x, waypoint_y
@@ -0,0 +1,133 @@
+import pygame
+try:
+    import numpy as np
+except ImportError:  # The store is optional, the game runs on plain entity objects without numpy
+    np = None
+
+class EntityView:
+    def __init__(self, store, index):
+        # Per-entity access to one row of an EntityStore, valid until the store next removes entities
+        self.store = store
+        self.index = index
+
+    def getX(self):
+        return int(self.store.x[self.index])
+
+    def getY(self):
+        return int(self.store.y[self.index])
+
+    def setX(self, x):
+        self.store.x[self.index] = x
+
+    def setY(self, y):
+        self.store.y[self.index] = y
+
+    @property
+    def position(self):
+        return self  # Quacks like a Point, so view.position.getX() works like on entity objects
+
+    @property
+    def health(self):
+        return int(self.store.health[self.index])
+
+    @property
+    def kind(self):
+        return int(self.store.kind[self.index])
+
+class EntityStore:
+    fields = {"x": "int32", "y": "int32", "dx": "int32", "dy": "int32", "health": "int32", "kind": "int8"}  # Column dtypes
+
+    def __init__(self, capacity=256):
+        # Struct-of-arrays storage: one contiguous array per field, rows 0..count-1 are live
+        if np is None:
+            raise ImportError("EntityStore requires numpy")
+        self.count = 0
+        self.allocate(capacity)
+
+    def allocate(self, capacity):
+        old = getattr(self, "x", None)
+        for name, dtype in self.fields.items():
+            array = np.zeros(capacity, dtype=dtype)
+            if old is not None:
+                array[:self.count] = getattr(self, name)[:self.count]
+            setattr(self, name, array)
+        self.capacity = capacity
+
+    def __len__(self):
+        return self.count
+
+    def add(self, x, y, dx, dy, health=0, kind=0):
+        # Append an entity, doubling the arrays when full; returns its current row
+        if self.count == self.capacity:
+            self.allocate(self.capacity * 2)
+        index = self.count
+        self.x[index] = x
+        self.y[index] = y
+        self.dx[index] = dx
+        self.dy[index] = dy
+        self.health[index] = health
+        self.kind[index] = kind
+        self.count += 1
+        return index
+
+    def clear(self):
+        self.count = 0
+
+    def views(self):
+        return [EntityView(self, index) for index in range(self.count)]
+
+    def positions(self):
+        # (count, 2) array of live top-left positions
+        return np.stack((self.x[:self.count], self.y[:self.count]), axis=1)
+
+    def advance(self, speed):
+        # Move every live entity by its direction times speed
+        count = self.count
+        self.x[:count] += self.dx[:count] * speed
+        self.y[:count] += self.dy[:count] * speed
+
+    def first_blocked(self, grid, speed):
+        # Per live entity, the first pixel step (1..n) of its move by direction times speed that stands
+        # on a set cell of grid, 0 when the whole move is clear. Steps follow sweep.step_position.
+        height, width = grid.shape
+        count = self.count
+        x, y = self.x[:count], self.y[:count]
+        dx, dy = self.dx[:count] * speed, self.dy[:count] * speed
+        steps = np.maximum(np.abs(dx), np.abs(dy))
+        divisor = np.maximum(steps, 1)
+        first = np.zeros(count, dtype=np.int32)
+        for step in range(1, int(steps.max()) + 1 if count else 1):
+            at = np.minimum(step, steps)
+            step_x = np.clip(x + dx * at // divisor, 0, width - 1)
+            step_y = np.clip(y + dy * at // divisor, 0, height - 1)
+            first[(first == 0) & (step <= steps) & grid[step_y, step_x]] = step
+        return first
+
+    def swept_overlapping(self, rect, width, height, speed):
+        # Rows of the live entities whose width x height box meets rect anywhere along their move
+        # by direction times speed (the bounding box of the move)
+        x, y = self.x[:self.count], self.y[:self.count]
+        end_x, end_y = x + self.dx[:self.count] * speed, y + self.dy[:self.count] * speed
+        left, top = np.minimum(x, end_x), np.minimum(y, end_y)
+        right, bottom = np.maximum(x, end_x) + width, np.maximum(y, end_y) + height
+        hits = (left < rect.right) & (right > rect.left) & (top < rect.bottom) & (bottom > rect.top)
+        return np.flatnonzero(hits).tolist()
+
+    def remove(self, mask):
+        # Drop every live entity where mask is True, compacting the rest in order
+        keep = ~mask
+        kept = int(keep.sum())
+        if kept == self.count:
+            return 0
+        for name in self.fields:
+            array = getattr(self, name)
+            array[:kept] = array[:self.count][keep]
+        removed = self.count - kept
+        self.count = kept
+        return removed
+
+
+def mask_to_array(mask):
+    # Copy a pygame mask into a (height, width) numpy bool array for batch lookups
+    surface = mask.to_surface(setcolor=(255, 255, 255, 255), unsetcolor=(0, 0, 0, 255))
+    return pygame.surfarray.array_red(surface).T > 0
@@ -0,0 +1,258 @@
+from game import Game
+from scenes import Playing
+from point import Point
+from input_source import HeldKeys, key_event
+from multiprocessing import shared_memory
+import multiprocessing
+import numpy as np
+import pygame
+import os
+
+# Discrete actions: index % 5 is the move (none, left, right, up, down), index // 5 whether to shoot
+MOVES = [None, pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN]
+NUM_ACTIONS = len(MOVES) * 2
+
+# Entity vector layout, positions scaled to 0..1 by the window size; missing entities are all zeros
+WIDTH, HEIGHT = 583, 546
+MAX_ENEMIES = 8
+MAX_BULLETS = 16
+MAX_COINS = 8
+PLAYER_FEATURES = 5   # x, y, health, direction x, direction y
+ENEMY_FEATURES = 5    # present, x, y, health fraction, advanced
+BULLET_FEATURES = 5   # present, x, y, direction x, direction y
+COIN_FEATURES = 3     # present, x, y
+VECTOR_SIZE = (PLAYER_FEATURES + MAX_ENEMIES * ENEMY_FEATURES + MAX_BULLETS * BULLET_FEATURES
+               + MAX_COINS * COIN_FEATURES)
+
+class ActionInput:
+    # Input source fed one action per tick by the environment
+    def __init__(self):
+        self.current_events = []
+        self.current_keys = HeldKeys(())
+
+    def set_action(self, action):
+        move = MOVES[action % len(MOVES)]
+        self.current_keys = HeldKeys(() if move is None else (move,))
+        self.current_events = [key_event(pygame.K_SPACE)] if action >= len(MOVES) else []
+
+    def events(self):
+        events = self.current_events
+        self.current_events = []  # A shot is a key press, it only fires on the tick it was chosen
+        return events
+
+    def pressed(self):
+        return self.current_keys
+
+class BattleCityEnv:
+    def __init__(self, observation="vector", frame_size=(84, 84), max_ticks=3600, repeat=1,
+                 coin_reward=1.0, kill_reward=5.0, stats_path=None):
+        # Headless Playing scene driven one action at a time. observation is "vector" (float32 entity
+        # features, see VECTOR_SIZE) or "frame" (downscaled uint8 RGB screen of frame_size (width, height)).
+        # Each step applies the action for repeat ticks; an episode ends when the player dies or
+        # after max_ticks ticks. With stats_path the stats of every episode go to that SQLite stats store.
+        if observation not in ("vector", "frame"):
+            raise ValueError(f"unknown observation type {observation!r}")
+        self.observation = observation
+        self.frame_size = frame_size
+        self.max_ticks = max_ticks
+        self.repeat = repeat
+        self.coin_reward = coin_reward
+        self.kill_reward = kill_reward
+        self.input = ActionInput()
+        # No AI time budget, so a seed always plays out the same episode
+        self.game = Game(headless=True, input_source=self.input, stats_path=stats_path, ai_budget_us=None)
+        self.ticks = 0
+        self.coins = 0
+        self.kills = 0
+        if observation == "vector":
+            self.observation_shape, self.observation_dtype = (VECTOR_SIZE,), np.float32
+        else:
+            self.observation_shape, self.observation_dtype = (frame_size[1], frame_size[0], 3), np.uint8
+
+    def reset(self, seed=None, out=None):
+        # Start a new episode and return its first observation (written into out when given)
+        game = self.game
+        game.new_session(seed)
+        game.player = game.new_player()
+        game.bullets.clear()
+        if game.bullet_store is not None:
+            game.bullet_store.clear()
+        game.coins.clear()
+        game.change_scene("playing")
+        self.ticks = 0
+        self.coins = 0
+        self.kills = 0
+        return self.observe(out)
+
+    def step(self, action, out=None):
+        # Apply action and return (observation, reward, done, info). The reward pays for picked up
+        # coins and destroyed enemies.
+        game = self.game
+        for _ in range(self.repeat):
+            self.input.set_action(action)
+            game.update()
+            self.ticks += 1
+            if game.player.health <= 0 or self.ticks >= self.max_ticks:
+                break
+        stats = game.stats
+        kills = stats.total_kills() - self.kills
+        coins = stats.coins - self.coins
+        self.kills += kills
+        self.coins = stats.coins
+        reward = coins * self.coin_reward + kills * self.kill_reward
+        dead = game.player.health <= 0
+        done = dead or self.ticks >= self.max_ticks
+        if done and game.current_scene is game.scenes.get("playing"):
+            game.finish_session()  # The episode stops here, the game never ticks on into GameOver
+        info = {"ticks": self.ticks, "score": stats.score, "kills": self.kills,
+                "health": game.player.health, "truncated": done and not dead}
+        return self.observe(out), reward, done, info
+
+    def observe(self, out=None):
+        if out is None:
+            out = np.zeros(self.observation_shape, self.observation_dtype)
+        if self.observation == "vector":
+            self.observe_vector(out)
+        else:
+            self.observe_frame(out)
+        return out
+
+    def observe_vector(self, out):
+        game = self.game
+        out[:] = 0
+        player = game.player
+        px, py = player.position.getX(), player.position.getY()
+        out[:PLAYER_FEATURES] = (px / WIDTH, py / HEIGHT, player.health / 100,
+                                 player.direction.getX() / 2, player.direction.getY() / 2)
+        index = PLAYER_FEATURES
+
+        # Nearest entities first, so the ones that matter survive the caps
+        def distance(position):
+            return (position.getX() - px) ** 2 + (position.getY() - py) ** 2
+
+        enemies = game.current_scene.enemies if isinstance(game.current_scene, Playing) else []
+        for enemy in sorted(enemies, key=lambda enemy: distance(enemy.position))[:MAX_ENEMIES]:
+            out[index:index + ENEMY_FEATURES] = (1, enemy.position.getX() / WIDTH, enemy.position.getY() / HEIGHT,
+                                                 enemy.health / enemy.initial_health, enemy.kind == "advanced")
+            index += ENEMY_FEATURES
+        index = PLAYER_FEATURES + MAX_ENEMIES * ENEMY_FEATURES
+
+        if game.bullet_store is not None:
+            bullets = [(view, Point(int(game.bullet_store.dx[view.index]), int(game.bullet_store.dy[view.index])))
+                       for view in game.bullet_store.views()]
+        else:
+            bullets = [(bullet.position, bullet.direction) for bullet in game.bullets]
+        for position, direction in sorted(bullets, key=lambda bullet: distance(bullet[0]))[:MAX_BULLETS]:
+            out[index:index + BULLET_FEATURES] = (1, position.getX() / WIDTH, position.getY() / HEIGHT,
+                                                  direction.getX() / 2, direction.getY() / 2)
+            index += BULLET_FEATURES
+        index = PLAYER_FEATURES + MAX_ENEMIES * ENEMY_FEATURES + MAX_BULLETS * BULLET_FEATURES
+
+        for coin in sorted(game.coins, key=lambda coin: distance(coin.position))[:MAX_COINS]:
+            out[index:index + COIN_FEATURES] = (1, coin.position.getX() / WIDTH, coin.position.getY() / HEIGHT)
+            index += COIN_FEATURES
+
+    def observe_frame(self, out):
+        game = self.game
+        game.renderer.invalidate()  # Other environments in this process may have drawn on the shared display
+        game.render(1.0)
+        frame = pygame.transform.smoothscale(game.screen, self.frame_size)
+        out[:] = pygame.surfarray.pixels3d(frame).swapaxes(0, 1)
+
+    def close(self):
+        # pygame is shut down with the process, only pending stats need writing
+        if self.game.stats_store is not None:
+            self.game.stats_store.close()
+
+def worker(connection, memory_name, shape, dtype, first, count, kwargs):
+    # Runs environments first..first+count-1 of a VectorEnv, writing their observations
+    # straight into the shared buffer
+    memory = shared_memory.SharedMemory(name=memory_name)
+    observations = np.ndarray(shape, dtype, buffer=memory.buf)[first:first + count]
+    envs = [BattleCityEnv(**kwargs) for _ in range(count)]
+    try:
+        while True:
+            command, data = connection.recv()
+            if command == "reset":
+                for env, seed, out in zip(envs, data, observations):
+                    env.reset(seed, out)
+                connection.send(None)
+            elif command == "step":
+                results = []
+                for env, action, out in zip(envs, data, observations):
+                    _, reward, done, info = env.step(action, out)
+                    if done:
+                        # Finished environments restart at once, seeded from their own RNG so runs stay
+                        # reproducible; the observation is then the new episode's first
+                        env.reset(None, out)
+                    results.append((reward, done, info))
+                connection.send(results)
+            elif command == "close":
+                break
+    finally:
+        for env in envs:
+            env.close()
+        del observations
+        memory.close()
+        connection.close()
+
+class VectorEnv:
+    def __init__(self, num_envs, processes=None, **kwargs):
+        # num_envs BattleCityEnv instances sharded over a pool of worker processes (one per core
+        # by default). Observations come back through one shared memory block of shape
+        # (num_envs, *observation_shape), so stepping only pickles actions, rewards and infos.
+        # kwargs are passed to every BattleCityEnv.
+        processes = min(num_envs, processes or os.cpu_count() or 1)
+        observation = kwargs.get("observation", "vector")
+        if observation == "vector":
+            shape, dtype = (num_envs, VECTOR_SIZE), np.float32
+        else:
+            width, height = kwargs.get("frame_size", (84, 84))
+            shape, dtype = (num_envs, height, width, 3), np.uint8
+        self.num_envs = num_envs
+        self.memory = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)) * np.dtype(dtype).itemsize)
+        self.observations = np.ndarray(shape, dtype, buffer=self.memory.buf)
+        self.connections = []
+        self.processes = []
+        self.shards = []  # (first, count) environments of each worker
+        first = 0
+        for shard in range(processes):
+            count = num_envs // processes + (shard < num_envs % processes)
+            self.shards.append((first, count))
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=worker, daemon=True,
+                                              args=(child, self.memory.name, shape, dtype, first, count, kwargs))
+            process.start()
+            child.close()
+            self.connections.append(parent)
+            self.processes.append(process)
+            first += count
+
+    def reset(self, seed=None):
+        # Reset every environment, environment i gets seed + i; returns a copy of the observations
+        for connection, (first, count) in zip(self.connections, self.shards):
+            connection.send(("reset", [None if seed is None else seed + first + index for index in range(count)]))
+        for connection in self.connections:
+            connection.recv()
+        return self.observations.copy()
+
+    def step(self, actions):
+        # One action per environment; returns (observations, rewards, dones, infos)
+        for connection, (first, count) in zip(self.connections, self.shards):
+            connection.send(("step", [int(action) for action in actions[first:first + count]]))
+        results = [result for connection in self.connections for result in connection.recv()]
+        rewards = np.array([result[0] for result in results], np.float32)
+        dones = np.array([result[1] for result in results], bool)
+        return self.observations.copy(), rewards, dones, [result[2] for result in results]
+
+    def close(self):
+        for connection in self.connections:
+            try:
+                connection.send(("close", None))
+            except (BrokenPipeError, OSError):
+                pass
+        for process in self.processes:
+            process.join(timeout=5)
+        del self.observations
+        self.memory.close()
+        self.memory.unlink()
@@ -1,160 +1,426 @@
-from scenes import MainMenu, Playing
+from scenes import SCENES, Playing
+from scene_manager import SceneManager
+from game_loop import GameLoop
 from player import Player
 from point import Point
 from coin import Coin
+from assets import assets, SPRITES, PLAYER_SPRITE, COIN_SPRITE, BULLET_SPRITE
+from level import Level, DEFAULT_LEVEL
+from bundle import load_bundle, DEFAULT_BUNDLE
+from spawn_index import SpawnIndex
+from spatial_hash import SpatialHash
+from navigation import FlowField
+from enemy_ai import AIScheduler
+from entity_store import EntityStore, mask_to_array
+from enemy_store import EnemyStore
+from enemy import EnemyFactory
+from input_source import LiveInput, InputPipeline, load_bindings
+from profiler import Profiler
+from profiler_overlay import ProfilerOverlay
+from renderer import Renderer
+from text import TextWidget
+from pool import Pool
+from bullet import Bullet
+from sweep import first_overlap
+from scheduler import Scheduler
+from audio import AudioManager
+from stats import Stats, StatsStore
+from replay import Recorder
+import hashlib
 import random
 import pygame
-import time
 import sys
+import os
+
+COIN_SOUND = "sounds/collision_coin.wav"
 
 class Game:
-    def __init__(self):
+    def __init__(self, headless=False, input_source=None, max_bullets=256, max_coins=32, seed=None, record_path=None,
+                 profile_path=None, level_path=None, stats_path=None, bundle_path=DEFAULT_BUNDLE, bindings_path=None,
+                 ai_budget_us=2000):
+        # Headless games use SDL's dummy video and audio drivers, read input from input_source
+        # (a ScriptedInput) and simulate one tick per frame as fast as possible.
+        # max_bullets and max_coins cap the live objects of the preallocated pools.
+        # All gameplay randomness comes from self.rng; with record_path every session is recorded
+        # (seed, per-tick input and state hashes) so replay.py can reproduce it.
+        # With profile_path the profiler runs from the start and its frame history is written there at game over.
+        # level_path picks the level file, levels/arena.json by default. With stats_path every finished
+        # session's stats are stored in that SQLite file, which also keeps the high scores.
+        # Images, masks and sounds come from the asset bundle at bundle_path when it is baked and
+        # up to date (see bake.py), from the files under images/ and sounds/ otherwise.
+        # bindings_path is a JSON file rebinding actions to other keys (see input_source.load_bindings).
+        # Enemy thinking is capped at ai_budget_us microseconds per tick; None lifts the cap, as
+        # recording does, since a time budget makes the simulation depend on the machine's speed.
+        self.headless = headless
+        self.rng = random.Random(seed)
+        self.record_path = record_path
+        self.recorder = None
+        if headless:
+            os.environ["SDL_VIDEODRIVER"] = "dummy"
+            os.environ["SDL_AUDIODRIVER"] = "dummy"
+        self.input = input_source or LiveInput()
+        self.profiler = Profiler(enabled=profile_path is not None)  # Per-subsystem timings and frame history
+        self.profile_path = profile_path
+        self.level = Level(level_path or DEFAULT_LEVEL)
         pygame.mixer.init()
-        self.screen = pygame.display.set_mode((583, 546))
+        self.screen = pygame.display.set_mode(self.level.size)
         pygame.display.set_caption("Battle City")
+        if bundle_path and assets.bundle is None:
+            assets.use_bundle(load_bundle(bundle_path))
+        # Input is pumped once per tick and handed to the scene as a snapshot of actions
+        self.input_pipeline = InputPipeline(load_bindings(bindings_path) if bindings_path else None)
+        self.input_pipeline.filter_events()
 
         # Load images and masks
-        self.background = pygame.image.load("images/background.png")
-        self.playground = pygame.image.load("images/playground.png")
-        self.borders_img = pygame.image.load("images/boarders.png")
-        self.player_img = pygame.image.load("images/player.png")
-        self.player_img = pygame.transform.scale(self.player_img, (25, 25))
-        self.player_mask = pygame.mask.from_surface(self.player_img)
-        self.borders_mask = pygame.mask.from_surface(self.borders_img)
+        assets.preload(SPRITES)  # Load, scale and mask every sprite once before the game loop starts
+        self.player_img = assets.image(*PLAYER_SPRITE)
+        self.player_mask = assets.mask(*PLAYER_SPRITE)
+
+        # The level never changes during a game: its background, the walkability of every sprite
+        # footprint (walls and bounds) and its spawn positions are derived once, or read from its cache
+        arena = self.level.arena({sprite: assets.mask(*sprite) for sprite in SPRITES})
+        self.renderer = Renderer(self.screen, [arena.background])
+        self.overlay = ProfilerOverlay(self.profiler)  # Toggled with F3 while playing
+        self.collision_map = arena.collision_map
+        self.borders_mask = self.collision_map.borders_mask
+        self.spawn_indexes = arena.spawn_indexes  # SpawnIndex per (sprite, region), others built on first use
+        self.collision_grid = SpatialHash()  # Broadphase for enemies and coins, rebuilt every tick
+        self.flow_field = FlowField(self.collision_map)  # Shared enemy routing towards the player
+        self.ai = AIScheduler(ai_budget_us if record_path is None else None)  # Enemy thinking spread over ticks
 
         # Initialize player and scene
-        self.player = Player(100, Point(75, 125))
-        self.current_scene = MainMenu(self)
-        self.bullets = []
-        self.coins = []            # New list to store coins
-        self.collected_coins = []  # List to store obtainde coins
-        self.removed_enemies = []  # List to track removed enemies and their respawn times
+        self.player = self.new_player()
+        self.scenes = SceneManager(self, SCENES)
+        self.current_scene = None
+        # Preallocated pools: when full, a new shot recycles the oldest bullet and coin spawns are skipped
+        self.bullets = Pool(lambda: Bullet(self, 10, Point(0, 0), Point(0, 0)), max_bullets, Pool.RECYCLE)
+        self.bullet_store = None   # Array-backed bullets, see enable_entity_store()
+        self.enemy_store = None    # Array-backed enemies, likewise
+        self.bullet_speed = 2      # Pixels per tick along the bullet's direction, any speed is swept
+        self.coins = Pool(lambda: Coin(Point(0, 0)), max_coins, Pool.DROP)
+        self.stats = Stats()       # Score and counters of the current session
+        self.stats_store = StatsStore(stats_path) if stats_path else None
+        self.session_seed = seed
+        self.session_started = False  # Set by new_session, see update()
+
+        # Timed events (respawns, coin spawns, invulnerability) run on simulation time
+        self.scheduler = Scheduler()
+        self.respawn_delay = 3            # Seconds before a killed enemy comes back
+        self.coin_interval = 100 / 60     # Mean seconds between coin spawns
+        self.invulnerability_time = 0     # Seconds the player ignores damage after a hit, 0 disables it
+        self.coin_spawn_event = None
+
+        # Sound effects on a bounded channel pool, music streamed per scene
+        self.audio = AudioManager()
+        self.audio.sound(COIN_SOUND)
 
-        # Load sound effects
-        self.collision_sound = pygame.mixer.Sound("sounds/collision_coin.wav")
+        # HUD text, re-rendered only when the score changes
+        self.score_widget = TextWidget("Score: {}", 24, (0, 0, 0), right=583 - 20, top=150)
 
         # Flag to control coin generation
         self.coins_enabled = False  # Coins generation disabled by default
 
+        # Fixed 60 Hz simulation, rendering decoupled from it, menus throttled while idle
+        self.loop = GameLoop(self.update, self.render, lambda: self.current_scene.idle, uncapped=headless,
+                             idle_work=self.scenes.preload_step)
+        self.change_scene("main_menu")
+        self.render_alpha = 0.0  # Fraction of a tick since the last update, for interpolation
+
     def start(self):
-        while True:
-            self.update()
+        self.loop.run()
+
+    def new_player(self):
+        return Player(self.level.player_health, Point(*self.level.player_start))
 
     def update(self):
-        self.current_scene.update()
-        self.update_bullets()
+        # One fixed simulation tick
+        self.rebuild_collision_grid()
+        with self.profiler.section("input"):
+            snapshot = self.input_pipeline.poll(self.input)
+        self.session_started = False
+        self.current_scene.update(snapshot)
+        if self.session_started:
+            return  # A session started by this tick's input begins with the next tick, as replays start it
         if self.coins_enabled:  # Only update coins if coins are enabled
-            self.update_coins()
-        self.respawn_enemies()
+            with self.profiler.section("coins"):
+                self.update_coins()
+        with self.profiler.section("scheduler"):
+            self.scheduler.advance(self.loop.dt)  # Run respawns, coin spawns and other timers that came due
 
-    def update_coins(self):
-        # Generate coins occasionally in limited area
-        min_x, min_y = 8, 60
-        max_x, max_y = 462 - 40, 485 - 40
+    def spawn_coin(self):
+        # Generate a coin in the level's coin zone, then schedule the next spawn after a random delay
+
+        # Free spot that is clear of the borders, the player and the other coins
+        occupied = [coin.get_rect() for coin in self.coins]
+        occupied.append(self.player.get_rect())
+        position = self.spawn_index(COIN_SPRITE, self.level.spawn_zones["coins"]).sample(occupied, self.rng)
+        coin = self.coins.acquire() if position is not None else None
+        if coin is not None:  # Skip this spawn when there is no free spot or the pool is full
+            coin.reset(*position)
+        self.schedule_coin_spawn()
 
-        if random.random() < 0.01: #
-            valid_position_found = False
-            while not valid_position_found:
-                coin_x = random.randint(min_x, max_x)
-                coin_y = random.randint(min_y, max_y)
-                coin_position = Point(coin_x, coin_y)
+    def schedule_coin_spawn(self):
+        # Exponential delays keep the old 1% chance per tick on average
+        delay = self.rng.expovariate(1 / self.coin_interval)
+        self.coin_spawn_event = self.scheduler.schedule(delay, self.spawn_coin, tag="coin")
 
-                coin = Coin(coin_position)
+    def update_coins(self):
+        # Check collision with player and update collected coins, masks are only compared
+        # for the coins whose bounding box touches the player
+        for coin in self.collision_grid.query(self.player.get_rect(), "coin"):
+            if coin.check_collision_with_player(self.player):
+                self.coins.release(coin)
+                self.collision_grid.remove(coin)
+                self.stats.add_coin()
+                self.audio.play(COIN_SOUND)
 
-                if not self.check_coin_collision(coin):
-                    valid_position_found = True
+    def enable_entity_store(self):
+        # Keep bullets and enemies in numpy struct-of-arrays stores: bullets move, bound-check and
+        # leave in batches, enemies think and glide in batches, for load-test levels with thousands
+        # of entities. Live bullets, enemies on the field and enemies waiting to respawn move into
+        # the stores.
+        self.bullet_store = EntityStore()
+        self.bullet_walls = mask_to_array(self.collision_map.blocked[BULLET_SPRITE])
+        for bullet in self.bullets:
+            self.bullet_store.add(bullet.position.getX(), bullet.position.getY(), bullet.direction.getX(),
+                                  bullet.direction.getY(), health=bullet.damage)  # Damage in the health column
+        self.bullets.clear()
+        self.enemy_store = EnemyStore(self.collision_map)
+        if isinstance(self.current_scene, Playing):
+            self.current_scene.enemies = [self.store_enemy(enemy) for enemy in self.current_scene.enemies]
+        for event in self.scheduler.pending("respawn"):
+            event.args = (self.store_enemy(event.args[0]),)
 
-            self.coins.append(coin)
+    def create_enemy(self, kind, health, position):
+        # New enemy of the EnemyFactory type kind, a view of an enemy store row when the store is on
+        if self.enemy_store is not None:
+            return self.enemy_store.add_enemy(kind, health, position.getX(), position.getY())
+        return EnemyFactory.create_enemy(kind, health, position)
 
-        # Check collision with player and update collected coins
-        for coin in self.coins[:]:
-            if coin.check_collision_with_player(self.player):
-                self.coins.remove(coin)
-                self.collected_coins.append(coin)
-                self.collision_sound.play()
+    def store_enemy(self, enemy):
+        # Copy an enemy object into the enemy store, returns its view
+        view = self.create_enemy(enemy.kind, enemy.initial_health, enemy.position)
+        view.health = enemy.health
+        view.heading = enemy.heading
+        view.next_think = enemy.next_think
+        return view
 
     def update_bullets(self):
-        # Update bullets' positions and check collisions with enemies
-        min_x, min_y = 8, 60
-        max_x, max_y = 462.8 - 15, 485 - 15
-        for bullet in self.bullets[:]:
-            bullet.move(self)
-            #Check if the bullet collided with enemy
-            if bullet.check_collision(self.current_scene.enemies):
-                self.bullets.remove(bullet)
-            #Check if bullet goes out from field
-            if bullet.position.getX() < min_x or bullet.position.getX() > max_x or bullet.position.getY() < min_y or bullet.position.getY() > max_y:
-                self.bullets.remove(bullet)
-
-    def respawn_enemies(self):
-        # Respawn enemies after a certain time
-        current_time = time.time()
-        for enemy, respawn_time in self.removed_enemies[:]:
-            if current_time >= respawn_time: #respawn_time = 3 sec
-                self.removed_enemies.remove((enemy, respawn_time))
-                enemy.health = enemy.initial_health  # Reset enemy health
-                self.current_scene.enemies.append(enemy)
-
-    def change_scene(self, new_scene):
-        # Change the current scene
-        self.current_scene = new_scene
-        self.current_scene.start()
+        # Update bullets' positions and check collisions with enemies, bullets leaving the play
+        # field are blocked by the collision map like those hitting the borders
+        if self.bullet_store is not None:
+            self.update_bullet_store()
+            return
+        for bullet in self.bullets:
+            bullet.move(self)  # Sweeps the whole move, releases the bullet on its first hit
+
+    def update_bullet_store(self):
+        # Same sweep as Bullet.move in batches: the first wall step of every bullet at once
+        # (positions off the grid clamp to its blocked edge), then per enemy the bullets whose swept
+        # box meets it, masks only for those. Each bullet hits whatever it reaches first.
+        store = self.bullet_store
+        speed = self.bullet_speed
+        wall_steps = store.first_blocked(self.bullet_walls, speed)
+        bullet_mask = assets.mask(*BULLET_SPRITE)
+        width, height = BULLET_SPRITE[1]
+        hits = {}  # Row -> (step, enemy) of the earliest enemy hit
+        for enemy in self.current_scene.enemies:
+            rect = enemy.get_rect()
+            for index in store.swept_overlapping(rect, width, height, speed):
+                limit = int(wall_steps[index]) - 1 if wall_steps[index] else None  # A wall hit in the same step wins
+                if index in hits:
+                    limit = hits[index][0] - 1 if limit is None else min(limit, hits[index][0] - 1)
+                dx, dy = int(store.dx[index]) * speed, int(store.dy[index]) * speed
+                step = first_overlap(bullet_mask, int(store.x[index]), int(store.y[index]), dx, dy,
+                                     enemy.mask, rect.left, rect.top, rect, limit)
+                if step is not None:
+                    hits[index] = (step, enemy)
+        for index in sorted(hits):
+            enemy = hits[index][1]
+            if enemy.health > 0:  # Later bullets aimed at an enemy killed this tick fly on
+                self.hit_enemy(enemy, int(store.health[index]))  # Bullets keep their damage in the health column
+            else:
+                del hits[index]
+        spent = wall_steps > 0
+        spent[list(hits)] = True
+        store.advance(speed)
+        store.remove(spent)
+
+    def hit_enemy(self, enemy, damage):
+        # Apply bullet damage to an enemy, a killed enemy leaves the field, respawns later and scores 5
+        enemy.health = enemy.health - damage
+        if enemy.health <= 0:
+            self.stats.add_kill(enemy.kind)
+            self.scheduler.schedule(self.respawn_delay, self.respawn_enemy, enemy, tag="respawn")
+            self.current_scene.enemies.remove(enemy)
+            self.collision_grid.remove(enemy)
+
+    def rebuild_collision_grid(self):
+        # Bucket coins and enemies by position once per tick, shared by every collision check
+        self.collision_grid.clear()
+        for coin in self.coins:
+            self.collision_grid.insert(coin, "coin", coin.get_rect())
+        if isinstance(self.current_scene, Playing):
+            for enemy in self.current_scene.enemies:
+                self.collision_grid.insert(enemy, "enemy", enemy.get_rect())
+
+    def respawn_enemy(self, enemy):
+        # Scheduled respawn of a killed enemy at the place it died
+        if isinstance(self.current_scene, Playing):
+            enemy.health = enemy.initial_health  # Reset enemy health
+            enemy.heading = (0, 0)               # Stands still until it thinks again
+            self.current_scene.enemies.append(enemy)
+
+    def hurt_player(self, damage):
+        # Damage the player and open the invulnerability window, if one is configured
+        if self.player.invulnerable:
+            return
+        self.player.decrease_health(damage)
+        self.stats.damage_taken += damage
+        if self.invulnerability_time > 0:
+            self.player.invulnerable = True
+            self.scheduler.schedule(self.invulnerability_time, self.end_invulnerability, tag="invulnerability")
+
+    def end_invulnerability(self):
+        self.player.invulnerable = False
+
+    def change_scene(self, name):
+        # Change the current scene to the named one (see scenes.SCENES), built once and reused
+        self.scenes.change(name)
+        self.audio.play_music(self.current_scene.music)
+        self.renderer.invalidate()  # The new scene starts from a full repaint
+
+    def render(self, alpha):
+        # Draw one frame of the current scene
+        self.render_alpha = alpha
+        with self.profiler.section("draw"):
+            self.current_scene.draw()
+        if self.profiler.enabled:
+            self.profiler.end_frame(self.entity_counts())
+
+    def entity_counts(self):
+        enemies = len(self.current_scene.enemies) if isinstance(self.current_scene, Playing) else 0
+        bullets = len(self.bullet_store) if self.bullet_store is not None else len(self.bullets)
+        return {"enemies": enemies, "bullets": bullets, "coins": len(self.coins), "events": len(self.scheduler),
+                "thinks": self.ai.thinks}
+
+    def toggle_overlay(self):
+        # Show or hide the profiler overlay, profiling starts with the first time it is shown
+        self.overlay.visible = not self.overlay.visible
+        if self.overlay.visible:
+            self.profiler.enabled = True
+
+    def export_profile(self, path=None):
+        # Dump the profiler's frame history (JSON lines, or CSV for a .csv path)
+        path = path or self.profile_path or "profile.jsonl"
+        self.profiler.export(path)
+        return path
+
+    def new_session(self, seed=None):
+        # Start a deterministic play session: reseed the RNG, restart simulation time and the stats and,
+        # when recording, log input from here on
+        if seed is None:
+            seed = self.rng.randrange(2 ** 63)  # Derived from the game seed, if one was given
+        self.rng.seed(seed)
+        self.session_seed = seed
+        self.stats = Stats()
+        self.scheduler = Scheduler()
+        self.coin_spawn_event = None
+        self.input_pipeline.clear()  # Presses buffered before the session must not act in it
+        self.session_started = True
+        if self.record_path:
+            self.recorder = Recorder(self, self.input, seed)
+            self.input = self.recorder
+
+    def state_hash(self):
+        # 64-bit digest of the simulation state, compared by replays to detect desyncs
+        state = [self.player.position.getX(), self.player.position.getY(), self.player.health,
+                 self.stats.score, len(self.scheduler.pending())]
+        if isinstance(self.current_scene, Playing):
+            state.extend((enemy.position.getX(), enemy.position.getY(), enemy.health) for enemy in self.current_scene.enemies)
+        state.extend((bullet.position.getX(), bullet.position.getY()) for bullet in self.bullets)
+        state.extend((coin.position.getX(), coin.position.getY()) for coin in self.coins)
+        return int.from_bytes(hashlib.blake2b(repr(state).encode(), digest_size=8).digest(), "little")
+
+    def finish_session(self):
+        # Queue the stats of the session that just ended for the stats store
+        if self.stats_store is not None:
+            self.stats_store.record(self.stats, self.level.name, self.session_seed)
+
+    def best_score(self):
+        if self.stats_store is None:
+            return None
+        scores = self.stats_store.high_scores(1, self.level.name)
+        return scores[0]["score"] if scores else None
 
     def end(self):
+        if self.recorder is not None:
+            self.recorder.save(self.record_path)
+        if self.stats_store is not None:
+            if isinstance(self.current_scene, Playing):
+                self.finish_session()  # Quit in the middle of a session
+            self.stats_store.close()
         pygame.quit()
         sys.exit()
 
     def draw(self):
-        # Draw game elements on the screen
-        self.screen.blit(self.background, (0, 0))
-        self.screen.blit(self.playground, (0, 0))
-        self.screen.blit(self.borders_img, (0, 0))
+        # Draw game elements on the screen, only the areas that changed since the last frame are updated
+        renderer = self.renderer
+        renderer.begin()
         player_position = (self.player.position.getX(), self.player.position.getY())
-        self.screen.blit(self.player_img, player_position)
+        renderer.blit(self.player_img, player_position)
 
         # Display score
-        pygame.font.init()
-        font = pygame.font.Font(pygame.font.get_default_font(), 24)
-        score_text = f"Score: {len(self.collected_coins)}"
-        score_rendered = font.render(score_text, True, (0, 0, 0))
-        score_rect = score_rendered.get_rect(right=583 - 20, top=150)
-        self.screen.blit(score_rendered, score_rect)
+        score_rendered, score_rect = self.score_widget.render(self.stats.score)
+        renderer.blit(score_rendered, score_rect)
 
         # Draw bullets
         for bullet in self.bullets:
-            bullet.draw(self.screen)
+            bullet.draw(renderer)
+        if self.bullet_store is not None:
+            bullet_image = assets.image(*BULLET_SPRITE)
+            renderer.blits([(bullet_image, (int(x), int(y))) for x, y in self.bullet_store.positions()])
 
         # Draw enemies if the current scene is Playing
         if isinstance(self.current_scene, Playing): #scene are only performed when self.current_scene is an instance of Playing
             for enemy in self.current_scene.enemies:
-                self.screen.blit(enemy.image, (enemy.position.getX(), enemy.position.getY()))
+                renderer.blit(enemy.image, (enemy.position.getX(), enemy.position.getY()))
 
         # Draw coins
         for coin in self.coins:
-            coin.draw(self.screen)
+            coin.draw(renderer)
+
+        if self.overlay.visible:
+            self.overlay.draw(renderer)
+        renderer.present()  # Update the changed areas of the display
 
-        pygame.display.flip()  # Update the display to show changes
+    def check_collision(self, x, y, sprite=PLAYER_SPRITE):
+        # Check collision with borders for the given sprite placed at (x, y)
+        return self.collision_map.collides(sprite, x, y)
 
-    def check_collision(self, x, y):
-        # Check collision with borders
-        offset = (int(x), int(y))
-        overlap = self.borders_mask.overlap(self.player.mask, offset)
-        return overlap is not None
+    def spawn_index(self, sprite, region):
+        # Index of valid spawn positions for the sprite inside region (min_x, min_y, max_x, max_y)
+        key = (sprite, region)
+        if key not in self.spawn_indexes:
+            self.spawn_indexes[key] = SpawnIndex(self.collision_map, sprite, region)
+        return self.spawn_indexes[key]
 
     def check_enemy_collision(self, enemy):
         # Check collision between enemy and borders
-        offset = (enemy.position.getX(), enemy.position.getY())
-        return self.borders_mask.overlap(enemy.mask, offset) is not None
+        return self.collision_map.collides(enemy.sprite, enemy.position.getX(), enemy.position.getY())
 
     def check_coin_collision(self, coin):
         # Check collision between coins and borders
-        offset = (coin.position.getX(), coin.position.getY())
-        return self.borders_mask.overlap(coin.mask, offset) is not None
+        return self.collision_map.collides(coin.sprite, coin.position.getX(), coin.position.getY())
 
     def start_coin_generation(self):
         # Enable coin generation
         self.coins_enabled = True
+        if self.coin_spawn_event is None or self.coin_spawn_event.cancelled:
+            self.schedule_coin_spawn()
 
     def stop_coin_generation(self):
         # Disable coin generation
-        self.coins_enabled = False
\ No newline at end of file
+        self.coins_enabled = False
+        if self.coin_spawn_event is not None:
+            self.scheduler.cancel(self.coin_spawn_event)
\ No newline at end of file
@@ -0,0 +1,70 @@
+import pygame
+import time
+
+class GameLoop:
+    def __init__(self, update, render, is_idle=None, tick_rate=60, render_rate=60, idle_rate=15, max_steps=5, uncapped=False,
+                 idle_work=None):
+        # update() advances the simulation by one fixed tick, render(alpha) draws a frame where alpha
+        # is the fraction of a tick elapsed since the last update (for interpolating positions)
+        self.update = update
+        self.render = render
+        self.is_idle = is_idle or (lambda: False)
+        self.tick_rate = tick_rate
+        self.render_rate = render_rate  # 0 renders as fast as possible
+        self.idle_rate = idle_rate      # Frame rate while the scene is idle (menus)
+        self.max_steps = max_steps      # Upper bound on catch-up ticks per frame
+        self.uncapped = uncapped        # Headless: one tick and one frame per iteration, no sleeping
+        self.idle_work = idle_work      # Background work (e.g. preloading) run after idle frames
+        self.dt = 1.0 / tick_rate
+        self.clock = pygame.time.Clock()
+        self.accumulator = 0.0
+        self.ticks = 0
+        self.previous = time.perf_counter()
+        self.running = False
+
+    def run(self):
+        self.running = True
+        self.previous = time.perf_counter()
+        while self.running:
+            self.run_frame()
+
+    def run_frame(self):
+        # Sleep until the next frame is due, then run the simulation ticks owed and draw once
+        if self.uncapped:
+            self.step()
+            self.render(1.0)
+            return
+        if self.is_idle():
+            self.clock.tick(self.idle_rate)
+        else:
+            self.clock.tick(self.render_rate)
+        now = time.perf_counter()
+        elapsed = now - self.previous
+        self.previous = now
+
+        if self.is_idle():
+            # Idle scenes only react to input, one update per frame is enough
+            self.accumulator = 0.0
+            self.step()
+            self.render(0.0)
+            if self.idle_work is not None:
+                self.idle_work()
+            return
+
+        self.accumulator += elapsed
+        steps = 0
+        while self.accumulator >= self.dt and steps < self.max_steps:
+            self.step()
+            self.accumulator -= self.dt
+            steps += 1
+        if steps == self.max_steps and self.accumulator >= self.dt:
+            # Too far behind (slow frame or pause), drop the backlog instead of spiralling
+            self.accumulator = 0.0
+        self.render(self.accumulator / self.dt)
+
+    def step(self):
+        self.update()
+        self.ticks += 1
+
+    def stop(self):
+        self.running = False
@@ -0,0 +1,130 @@
+from collections import namedtuple, deque
+import pygame
+import json
+
+# Actions and the keys bound to them unless a bindings file says otherwise
+DEFAULT_BINDINGS = {
+    "left": [pygame.K_LEFT], "right": [pygame.K_RIGHT], "up": [pygame.K_UP], "down": [pygame.K_DOWN],
+    "shoot": [pygame.K_SPACE], "quit": [pygame.K_q], "overlay": [pygame.K_F3], "export_profile": [pygame.K_F4],
+}
+# Event types the game reacts to, SDL drops every other type before it reaches the queue
+ALLOWED_EVENTS = [pygame.QUIT, pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN, pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED]
+
+# A buffered press of an action at simulation time; clicks are "click" presses with the mouse position
+Press = namedtuple("Press", "action time position")
+
+class InputSnapshot(namedtuple("InputSnapshot", "tick time held quit expose")):
+    # Immutable state input of one tick: the actions held, whether the window was closed and whether
+    # it has to be repainted. Presses are not in it: they are consumed, so scenes take them from the
+    # InputPipeline's buffer, which also carries them over a scene change.
+    __slots__ = ()
+
+    def holding(self, action):
+        return action in self.held
+
+class InputPipeline:
+    def __init__(self, bindings=None, dt=1 / 60, buffer_time=0.1):
+        # Turns one input source pump per tick into an InputSnapshot of held actions and a buffer of
+        # presses that scenes take(). bindings maps actions to key codes and replaces the default keys
+        # of the actions it names. A press stays buffered until a scene takes it or for buffer_time
+        # seconds of simulation time, so presses arriving while the scene changes reach the next scene
+        # instead of being dropped.
+        self.bindings = dict(DEFAULT_BINDINGS)
+        self.bindings.update(bindings or {})
+        self.actions = {key: action for action, keys in self.bindings.items() for key in keys}
+        self.dt = dt
+        self.buffer_time = buffer_time
+        self.buffer = deque()
+        self.tick = 0
+        self.snapshot = InputSnapshot(0, 0.0, frozenset(), False, False)
+
+    def filter_events(self):
+        # Only queue the event types the game handles, needs pygame's video system
+        pygame.event.set_blocked(None)
+        pygame.event.set_allowed(ALLOWED_EVENTS)
+
+    def poll(self, source):
+        # The tick's single pump of source: buffer its presses and snapshot the held actions
+        self.tick += 1
+        now = self.tick * self.dt  # Simulation time, so replays buffer exactly like the recording
+        quit = expose = False
+        for event in source.events():
+            if event.type == pygame.QUIT:
+                quit = True
+            elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                expose = True
+            elif event.type == pygame.KEYDOWN:
+                action = self.actions.get(event.key)
+                if action is not None:
+                    self.buffer.append(Press(action, now, None))
+            elif event.type == pygame.MOUSEBUTTONDOWN:
+                self.buffer.append(Press("click", now, event.pos))
+        while self.buffer and self.buffer[0].time < now - self.buffer_time:
+            self.buffer.popleft()
+        keys = source.pressed()
+        held = frozenset(action for action, bound in self.bindings.items() if any(keys[key] for key in bound))
+        self.snapshot = InputSnapshot(self.tick, now, held, quit, expose)
+        return self.snapshot
+
+    def take(self, action):
+        # Remove and return the oldest buffered press of action, None when there is none
+        for press in self.buffer:
+            if press.action == action:
+                self.buffer.remove(press)
+                return press
+        return None
+
+    def clear(self):
+        self.buffer.clear()
+
+def load_bindings(path):
+    # Read a JSON file mapping action names to lists of pygame key names, e.g. {"shoot": ["left ctrl"]}
+    with open(path) as file:
+        data = json.load(file)
+    bindings = {}
+    for action, names in data.items():
+        if action not in DEFAULT_BINDINGS:
+            raise ValueError(f"unknown action {action!r} in {path}")
+        bindings[action] = [pygame.key.key_code(name) for name in names]
+    return bindings
+
+class LiveInput:
+    # Keyboard and mouse input from the pygame event queue
+    def events(self):
+        return pygame.event.get()
+
+    def pressed(self):
+        return pygame.key.get_pressed()
+
+class HeldKeys:
+    def __init__(self, keys):
+        # Stand-in for pygame.key.get_pressed(): keys[pygame.K_LEFT] is True while K_LEFT is held
+        self.keys = set(keys)
+
+    def __getitem__(self, key):
+        return key in self.keys
+
+class ScriptedInput:
+    def __init__(self, script=None):
+        # script(tick) returns (events, held_keys) for each tick; events are pygame.event.Event
+        # objects and held_keys the key codes held down. Without a script nothing is pressed.
+        self.script = script
+        self.tick = 0
+        self.current_events = []
+        self.current_keys = HeldKeys(())
+
+    def events(self):
+        # Called once per tick by the active scene, advances the script
+        if self.script is not None:
+            events, keys = self.script(self.tick)
+            self.current_events = list(events)
+            self.current_keys = HeldKeys(keys)
+        self.tick += 1
+        return self.current_events
+
+    def pressed(self):
+        return self.current_keys
+
+def key_event(key):
+    # KEYDOWN event for scripts
+    return pygame.event.Event(pygame.KEYDOWN, key=key)
@@ -0,0 +1,167 @@
+from collision_map import CollisionMap
+from spawn_index import SpawnIndex
+from assets import assets, SPRITES, COIN_SPRITE
+from enemy import ENEMY_SPRITES
+from array import array
+import hashlib
+import pickle
+import pygame
+import json
+import glob
+import zlib
+import os
+
+DEFAULT_LEVEL = "levels/arena.json"
+CACHE_VERSION = 1  # Bump when the derived data or its layout changes
+
+class Arena:
+    def __init__(self, background, collision_map, spawn_indexes):
+        # Everything derived from a level: the composited static background, the collision map
+        # (walls and bounds for every sprite) and the spawn indexes of the level's spawn zones
+        self.background = background
+        self.collision_map = collision_map
+        self.spawn_indexes = spawn_indexes
+
+class Level:
+    def __init__(self, path):
+        # A level is a JSON file with:
+        #   size         window size the level is drawn for
+        #   layers       images composited in order under the tiles
+        #   walls        optional image whose opaque pixels are walls
+        #   tiles        compact tile grid, one string per row and one character per tile, placed at
+        #                origin with tile_size pixel tiles; legend maps the characters to
+        #                {"solid": bool, "color": [r, g, b]} or {"solid": bool, "image": path}
+        #   bounds       play field (min_x, min_y, max_x, max_y) no sprite may leave
+        #   player       {"position": [x, y], "health": n}
+        #   spawn_zones  named regions (min_x, min_y, max_x, max_y) of spawn positions, "coins" for coins
+        #   enemies      roster of {"type", "health", "count", "zone"} for EnemyFactory
+        with open(path, "rb") as file:
+            self.source = file.read()
+        data = json.loads(self.source)
+        self.path = path
+        self.name = data.get("name", os.path.splitext(os.path.basename(path))[0])
+        self.size = tuple(data["size"])
+        self.layers = data.get("layers", [])
+        self.walls = data.get("walls")
+        self.tile_size = data.get("tile_size", 16)
+        self.origin = tuple(data.get("origin", (0, 0)))
+        self.tiles = data.get("tiles", [])
+        self.legend = data.get("legend", {})
+        self.bounds = tuple(data["bounds"])
+        player = data.get("player", {})
+        self.player_start = tuple(player.get("position", self.bounds[:2]))
+        self.player_health = player.get("health", 100)
+        self.spawn_zones = {name: tuple(zone) for name, zone in data.get("spawn_zones", {}).items()}
+        self.roster = data.get("enemies", [])
+        self.hash = self.content_hash()
+
+    def files(self):
+        # Every file the derived data depends on besides the level itself
+        paths = list(self.layers)
+        if self.walls:
+            paths.append(self.walls)
+        paths.extend(tile["image"] for tile in self.legend.values() if "image" in tile)
+        paths.extend(path for path, _ in SPRITES)
+        return paths
+
+    def content_hash(self):
+        digest = hashlib.blake2b(digest_size=8)
+        digest.update(repr((CACHE_VERSION, SPRITES)).encode())
+        digest.update(self.source)
+        for path in self.files():
+            with open(path, "rb") as file:
+                digest.update(file.read())
+        return digest.hexdigest()
+
+    def spawn_regions(self):
+        # (sprite, region) of every spawn index the level needs: coins and each roster entry
+        regions = []
+        if "coins" in self.spawn_zones:
+            regions.append((COIN_SPRITE, self.spawn_zones["coins"]))
+        for entry in self.roster:
+            key = (ENEMY_SPRITES[entry["type"]], self.spawn_zones[entry["zone"]])
+            if key not in regions:
+                regions.append(key)
+        return regions
+
+    def cache_path(self):
+        return f"{os.path.splitext(self.path)[0]}.{self.hash}.cache"
+
+    def arena(self, sprite_masks):
+        # Derived data for the level from the cache next to it, built (and cached) when missing or stale
+        arena = self.load_cache(sprite_masks)
+        if arena is None:
+            arena = self.build(sprite_masks)
+            self.save_cache(arena)
+        return arena
+
+    def build(self, sprite_masks):
+        # Composite the background and collect the walls from the layers and tiles in one pass,
+        # then derive the collision map and spawn indexes
+        background = pygame.Surface(self.size)
+        for layer in self.layers:
+            background.blit(assets.image(layer), (0, 0))
+        walls = pygame.mask.from_surface(assets.image(self.walls)) if self.walls else pygame.mask.Mask(self.size)
+
+        size = self.tile_size
+        solid = pygame.mask.Mask((size, size), fill=True)
+        origin_x, origin_y = self.origin
+        for row, line in enumerate(self.tiles):
+            for column, char in enumerate(line):
+                tile = self.legend.get(char)
+                if tile is None:
+                    continue  # Characters without a legend entry are empty floor
+                position = (origin_x + column * size, origin_y + row * size)
+                if "image" in tile:
+                    background.blit(assets.image(tile["image"], (size, size)), position)
+                elif "color" in tile:
+                    background.fill(tile["color"], (*position, size, size))
+                if tile.get("solid"):
+                    walls.draw(solid, position)
+
+        collision_map = CollisionMap(walls, sprite_masks, self.bounds)
+        spawn_indexes = {(sprite, region): SpawnIndex(collision_map, sprite, region)
+                         for sprite, region in self.spawn_regions()}
+        return Arena(background, collision_map, spawn_indexes)
+
+    def save_cache(self, arena):
+        collision_map = arena.collision_map
+        data = {
+            "version": CACHE_VERSION,
+            "background": zlib.compress(pygame.image.tobytes(arena.background, "RGB"), 1),
+            "walls": mask_to_bytes(collision_map.borders_mask),
+            "blocked": {sprite: mask_to_bytes(mask) for sprite, mask in collision_map.blocked.items()},
+            "spawn": {key: (index.xs.tobytes(), index.ys.tobytes()) for key, index in arena.spawn_indexes.items()},
+        }
+        try:
+            for stale in glob.glob(f"{glob.escape(os.path.splitext(self.path)[0])}.*.cache"):
+                os.remove(stale)
+            with open(self.cache_path(), "wb") as file:
+                pickle.dump(data, file, protocol=pickle.HIGHEST_PROTOCOL)
+        except OSError:
+            pass  # Read-only level directory, the data is simply rebuilt next time
+
+    def load_cache(self, sprite_masks):
+        try:
+            with open(self.cache_path(), "rb") as file:
+                data = pickle.load(file)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        if data.get("version") != CACHE_VERSION or not set(sprite_masks) <= set(data["blocked"]):
+            return None
+        background = pygame.image.frombytes(zlib.decompress(data["background"]), self.size, "RGB")
+        collision_map = CollisionMap(bytes_to_mask(data["walls"], self.size), {}, self.bounds)
+        for sprite, blocked in data["blocked"].items():
+            collision_map.blocked[sprite] = bytes_to_mask(blocked, self.size)
+        spawn_indexes = {}
+        for (sprite, region), (xs, ys) in data["spawn"].items():
+            positions = (array('H', xs), array('H', ys))
+            spawn_indexes[(sprite, region)] = SpawnIndex(collision_map, sprite, region, positions=positions)
+        return Arena(background, collision_map, spawn_indexes)
+
+def mask_to_bytes(mask):
+    surface = mask.to_surface(setcolor=(255, 255, 255, 255), unsetcolor=(0, 0, 0, 0))
+    return zlib.compress(pygame.image.tobytes(surface, "RGBA"), 1)
+
+def bytes_to_mask(data, size):
+    return pygame.mask.from_surface(pygame.image.frombytes(zlib.decompress(data), size, "RGBA"))
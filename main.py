@@ -1,7 +1,18 @@
 from game import Game
+import argparse
 
 def main():
-    game = Game()  # Initialize the game
+    parser = argparse.ArgumentParser(description="Battle City")
+    parser.add_argument("--record", metavar="PATH", help="record the session for replay.py")
+    parser.add_argument("--seed", type=int, help="seed for the game's random events")
+    parser.add_argument("--level", metavar="PATH", help="level file to play, levels/arena.json by default")
+    parser.add_argument("--stats", metavar="PATH", default="stats.sqlite", help="SQLite file for session stats and high scores")
+    parser.add_argument("--profile", metavar="PATH", help="profile every frame and write the history (.jsonl or .csv) at game over")
+    parser.add_argument("--bindings", metavar="PATH", help="JSON file binding actions to keys, e.g. {\"shoot\": [\"left ctrl\"]}")
+    args = parser.parse_args()
+
+    game = Game(seed=args.seed, record_path=args.record, profile_path=args.profile,
+                level_path=args.level, stats_path=args.stats, bindings_path=args.bindings)  # Initialize the game
     game.start()   # Start the game loop
 
 if __name__ == "__main__":
@@ -0,0 +1,90 @@
+from collections import deque
+from array import array
+import pygame
+
+# Neighbour offsets, orthogonal first so ties prefer straight moves
+NEIGHBOURS = [(1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1)]
+
+class FlowField:
+    def __init__(self, collision_map, size=(25, 25), cell_size=8):
+        # Breadth-first distance field over a coarse grid of the arena. A cell is walkable when a
+        # full size x size box fits at its top-left corner, which covers every enemy sprite mask.
+        self.cell_size = cell_size
+        self.columns = collision_map.width // cell_size + 1
+        self.rows = collision_map.height // cell_size + 1
+        box = ("box", size)
+        collision_map.add_footprint(box, pygame.mask.Mask(size, fill=True))
+        self.walkable = bytearray(self.columns * self.rows)
+        for row in range(self.rows):
+            for column in range(self.columns):
+                if not collision_map.collides(box, column * cell_size, row * cell_size):
+                    self.walkable[row * self.columns + column] = 1
+        self.distance = array('i', [-1]) * (self.columns * self.rows)
+        self.target = None
+        self.recomputes = 0
+
+    def cell_of(self, x, y):
+        return int(x) // self.cell_size, int(y) // self.cell_size
+
+    def update(self, x, y):
+        # Recompute the field only when the target (the player) has moved into another cell
+        target = self.cell_of(x, y)
+        if target == self.target:
+            return
+        self.target = target
+        self.recomputes += 1
+
+        columns, rows, walkable = self.columns, self.rows, self.walkable
+        distance = array('i', [-1]) * (columns * rows)
+        column, row = target
+        if not (0 <= column < columns and 0 <= row < rows):
+            self.distance = distance
+            return
+        distance[row * columns + column] = 0
+        queue = deque([target])
+        if not walkable[row * columns + column]:
+            # The player's mask fits where the full box does not, start from the walkable cells around it
+            for dx in range(-2, 3):
+                for dy in range(-2, 3):
+                    if 0 <= column + dx < columns and 0 <= row + dy < rows and walkable[(row + dy) * columns + column + dx]:
+                        distance[(row + dy) * columns + column + dx] = 0
+                        queue.append((column + dx, row + dy))
+        while queue:
+            column, row = queue.popleft()
+            next_distance = distance[row * columns + column] + 1
+            for dx, dy in NEIGHBOURS:
+                next_column, next_row = column + dx, row + dy
+                if not (0 <= next_column < columns and 0 <= next_row < rows):
+                    continue
+                index = next_row * columns + next_column
+                if distance[index] != -1 or not walkable[index]:
+                    continue
+                # No cutting corners: both orthogonal cells of a diagonal step must be walkable
+                if dx and dy and not (walkable[row * columns + next_column] and walkable[next_row * columns + column]):
+                    continue
+                distance[index] = next_distance
+                queue.append((next_column, next_row))
+        self.distance = distance
+
+    def next_waypoint(self, x, y):
+        # Top-left pixel of the neighbouring cell closest to the target, or None when the
+        # position is already in the target cell or cannot reach it
+        columns, rows, distance = self.columns, self.rows, self.distance
+        column, row = self.cell_of(x, y)
+        if not (0 <= column < columns and 0 <= row < rows):
+            return None
+        best = distance[row * columns + column]
+        if best == 0:
+            return None
+        if best == -1:
+            best = columns * rows  # Standing in a cell the box does not fit, any reachable neighbour will do
+        waypoint = None
+        for dx, dy in NEIGHBOURS:
+            next_column, next_row = column + dx, row + dy
+            if not (0 <= next_column < columns and 0 <= next_row < rows):
+                continue
+            value = distance[next_row * columns + next_column]
+            if value != -1 and value < best:
+                best = value
+                waypoint = (next_column * self.cell_size, next_row * self.cell_size)
+        return waypoint
@@ -1,5 +1,5 @@
 from point import Point
-from bullet import Bullet
+from assets import assets, PLAYER_SPRITE
 import pygame
 
 class Player:
@@ -7,30 +7,39 @@ class Player:
         # Initialize player attributes
         self.health = health
         self.position = position
-        self.image = pygame.image.load("images/player.png")
-        self.image = pygame.transform.scale(self.image, (25, 25))
-        self.mask = pygame.mask.from_surface(self.image)
+        self.direction = Point(0, -2)  # Facing up until the first move
+        self.invulnerable = False      # Set by the game for a short time after a hit
+        self.sprite = PLAYER_SPRITE
+        self.image = assets.image(*self.sprite)
+        self.mask = assets.mask(*self.sprite)
 
     def move(self, x: int, y: int, game):
         # Move player based on keyboard input
         new_x = self.position.getX() + x
         new_y = self.position.getY() + y
 
-        min_x, min_y = 8, 60
-        max_x, max_y = 462.8 - 25, 485 - 25 
-
-        # Check if player doesn't go out from limited coordinates and doesn't collide with borders
-        if min_x <= new_x <= max_x and min_y <= new_y <= max_y and not game.check_collision(new_x, new_y):
+        # Check that the player doesn't collide with the borders or leave the play field
+        if not game.check_collision(new_x, new_y, self.sprite):
             self.position.setX(new_x)
             self.position.setY(new_y)
             self.direction = Point(x, y)  # Update direction based on movement
 
     def shoot(self, game):
-        # Create a bullet and add it to the game's bullet list
-        bullet_position = Point(self.position.getX(), self.position.getY())
-        bullet = Bullet(game, 10, bullet_position, self.direction)
-        game.bullets.append(bullet)
+        # Take a bullet from the game's bullet pool and fire it from the player's position
+        game.stats.shots += 1
+        if game.bullet_store is not None:
+            game.bullet_store.add(self.position.getX(), self.position.getY(), self.direction.getX(), self.direction.getY(), health=10)
+            return
+        bullet = game.bullets.acquire()
+        if bullet is not None:
+            bullet.reset(self.position.getX(), self.position.getY(), self.direction.getX(), self.direction.getY())
+
+    def get_rect(self):
+        # Bounding rectangle of the player at its current position
+        return pygame.Rect(self.position.getX(), self.position.getY(), *self.sprite[1])
 
     def decrease_health(self, damage):
-        # Decrease player's health
+        # Decrease player's health, hits during an invulnerability window are ignored
+        if self.invulnerable:
+            return
         self.health = self.health - damage
\ No newline at end of file
@@ -0,0 +1,54 @@
+class Pool:
+    # What acquire() does when every slot is live
+    DROP = "drop"        # Return None, the caller skips the spawn
+    RECYCLE = "recycle"  # Reuse the oldest live object
+
+    def __init__(self, factory, capacity, overflow=DROP):
+        # Fixed set of preallocated objects. Live objects are kept in an insertion-ordered dict,
+        # so acquire, release and finding the oldest are all O(1) and iteration follows spawn order.
+        self.capacity = capacity
+        self.overflow = overflow
+        self.free = [factory() for _ in range(capacity)]
+        self.live = {}
+        self.dropped = 0
+        self.recycled = 0
+
+    def acquire(self):
+        # Take a free object (the caller resets its state), or apply the overflow policy
+        if self.free:
+            item = self.free.pop()
+        elif self.overflow == Pool.RECYCLE and self.live:
+            item = next(iter(self.live))
+            del self.live[item]
+            self.recycled += 1
+        else:
+            self.dropped += 1
+            return None
+        self.live[item] = None
+        return item
+
+    def release(self, item):
+        # Return a live object to the pool; releasing twice is harmless and returns False
+        if item not in self.live:
+            return False
+        del self.live[item]
+        self.free.append(item)
+        return True
+
+    def clear(self):
+        self.free.extend(self.live)
+        self.live.clear()
+
+    def __contains__(self, item):
+        return item in self.live
+
+    def __iter__(self):
+        # Iterates over a snapshot, so objects can be released while looping
+        return iter(tuple(self.live))
+
+    def __len__(self):
+        return len(self.live)
+
+    def stats(self):
+        return {"live": len(self.live), "free": len(self.free), "capacity": self.capacity,
+                "dropped": self.dropped, "recycled": self.recycled}
@@ -0,0 +1,124 @@
+import time
+import json
+import csv
+
+class Section:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.profiler.add(self.name, time.perf_counter() - self.start)
+
+class NullSection:
+    # Shared no-op context manager used while profiling is disabled
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc):
+        pass
+
+NULL_SECTION = NullSection()
+
+class RingBuffer:
+    def __init__(self, capacity):
+        # Keeps the last capacity items in a preallocated list, overwriting the oldest
+        self.items = [None] * capacity
+        self.capacity = capacity
+        self.next = 0
+        self.count = 0
+
+    def append(self, item):
+        self.items[self.next] = item
+        self.next = (self.next + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+
+    def clear(self):
+        self.items = [None] * self.capacity
+        self.next = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        # Oldest first
+        start = self.next - self.count
+        return (self.items[(start + index) % self.capacity] for index in range(self.count))
+
+class Profiler:
+    def __init__(self, enabled=False, history=600):
+        # Accumulated seconds and call counts per named section of the game loop, plus one record per
+        # frame (frame time, section times, entity counts) in a ring buffer of the last history frames.
+        # While disabled, section() hands out a shared no-op and nothing is recorded.
+        self.enabled = enabled
+        self.totals = {}
+        self.calls = {}
+        self.frame = {}  # Section seconds of the frame in progress
+        self.history = RingBuffer(history)
+        self.frames = 0
+        self.last_frame = None
+
+    def section(self, name):
+        # with profiler.section("bullets"): ... times the block while enabled
+        if not self.enabled:
+            return NULL_SECTION
+        return Section(self, name)
+
+    def add(self, name, seconds):
+        self.totals[name] = self.totals.get(name, 0.0) + seconds
+        self.calls[name] = self.calls.get(name, 0) + 1
+        self.frame[name] = self.frame.get(name, 0.0) + seconds
+
+    def end_frame(self, counts):
+        # Close the frame: record the time since the previous frame, the sections timed in it
+        # (all the ticks it ran and the draw) and the given entity counts
+        now = time.perf_counter()
+        frame_ms = (now - self.last_frame) * 1000 if self.last_frame is not None else 0.0
+        self.last_frame = now
+        self.history.append({
+            "frame": self.frames,
+            "time": now,
+            "frame_ms": frame_ms,
+            "sections": {name: seconds * 1000 for name, seconds in self.frame.items()},
+            "counts": counts,
+        })
+        self.frames += 1
+        self.frame = {}
+
+    def reset(self):
+        self.totals.clear()
+        self.calls.clear()
+        self.frame = {}
+        self.history.clear()
+        self.frames = 0
+        self.last_frame = None
+
+    def export(self, path):
+        # Write the recorded frames to path, as CSV for a .csv path and JSON lines otherwise
+        if path.endswith(".csv"):
+            self.export_csv(path)
+        else:
+            self.export_jsonl(path)
+
+    def export_jsonl(self, path):
+        with open(path, "w") as file:
+            for record in self.history:
+                file.write(json.dumps(record) + "\n")
+
+    def export_csv(self, path):
+        # One row per frame, a ms_<section> column per section and a column per entity count
+        records = list(self.history)
+        sections = sorted({name for record in records for name in record["sections"]})
+        counts = sorted({name for record in records for name in record["counts"]})
+        with open(path, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["frame", "time", "frame_ms"] + ["ms_" + name for name in sections] + counts)
+            for record in records:
+                writer.writerow([record["frame"], record["time"], record["frame_ms"]]
+                                + [record["sections"].get(name, 0.0) for name in sections]
+                                + [record["counts"].get(name, 0) for name in counts])
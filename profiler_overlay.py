@@ -0,0 +1,42 @@
+from text import text_cache
+import pygame
+
+class ProfilerOverlay:
+    def __init__(self, profiler, position=(8, 8), width=240, graph_height=40, budget_ms=1000 / 60):
+        # Frame statistics drawn over the game from the profiler's history: FPS, a frame-time graph
+        # with one column per recorded frame (the line marks budget_ms) and the section breakdown
+        # of the last frame. Only costs anything while visible.
+        self.profiler = profiler
+        self.position = position
+        self.width = width
+        self.graph_height = graph_height
+        self.budget_ms = budget_ms
+        self.visible = False
+
+    def draw(self, renderer):
+        history = list(self.profiler.history)[-self.width:]
+        if not history:
+            return
+        last = history[-1]
+        recent = [record["frame_ms"] for record in history[-30:] if record["frame_ms"] > 0]
+        fps = 1000 * len(recent) / sum(recent) if recent else 0.0
+        lines = [f"{fps:.0f} fps  {last['frame_ms']:.1f} ms"]
+        lines += [f"{name:<10}{ms:6.2f} ms" for name, ms in sorted(last["sections"].items(), key=lambda item: -item[1])]
+        lines.append("  ".join(f"{name} {count}" for name, count in last["counts"].items()))
+
+        font = text_cache.font(14)
+        line_height = font.get_linesize()
+        graph = self.graph_height
+        surface = pygame.Surface((self.width, graph + 4 + line_height * len(lines)), pygame.SRCALPHA)
+        surface.fill((0, 0, 0, 160))
+        scale = graph / (2 * self.budget_ms)  # Twice the budget fills the graph
+        for x, record in enumerate(history):
+            height = min(graph, record["frame_ms"] * scale)
+            color = (90, 220, 90) if record["frame_ms"] <= self.budget_ms * 1.1 else (230, 80, 80)
+            pygame.draw.line(surface, color, (x, graph - 1), (x, graph - 1 - height))
+        budget_y = graph - 1 - self.budget_ms * scale
+        pygame.draw.line(surface, (255, 255, 255, 120), (0, budget_y), (self.width, budget_y))
+        for index, line in enumerate(lines):
+            # Rendered directly, the numbers change every frame and would only churn the text cache
+            surface.blit(font.render(line, True, (255, 255, 255)), (4, graph + 2 + index * line_height))
+        renderer.blit(surface, self.position)
@@ -0,0 +1,44 @@
+import pygame
+
+class Renderer:
+    def __init__(self, screen, layers):
+        # Static layers (background, playground, borders) are composited once into a single surface;
+        # each frame only the areas sprites covered last frame or cover now are redrawn and presented
+        self.screen = screen
+        self.background = pygame.Surface(screen.get_size()).convert()
+        for layer in layers:
+            self.background.blit(layer, (0, 0))
+        self.previous = []  # Rects drawn in the last frame
+        self.current = []
+        self.full_redraw = True
+
+    def invalidate(self):
+        # Repaint and present the whole screen on the next frame (scene change, window exposed)
+        self.full_redraw = True
+
+    def begin(self):
+        # Erase last frame's sprites by restoring the static background under them
+        if self.full_redraw:
+            self.screen.blit(self.background, (0, 0))
+        else:
+            for rect in self.previous:
+                self.screen.blit(self.background, rect, rect)
+
+    def blit(self, image, position):
+        # Same signature as Surface.blit so entities can draw onto the renderer like onto the screen
+        rect = self.screen.blit(image, position)
+        self.current.append(rect)
+        return rect
+
+    def blits(self, sequence):
+        self.current.extend(self.screen.blits(sequence))
+
+    def present(self):
+        # Push only the changed areas, old and new positions, to the display
+        if self.full_redraw:
+            pygame.display.flip()
+        else:
+            pygame.display.update(self.previous + self.current)
+        self.previous = self.current
+        self.current = []
+        self.full_redraw = False
@@ -0,0 +1,171 @@
+from input_source import HeldKeys, key_event, DEFAULT_BINDINGS
+import argparse
+import struct
+import pygame
+import sys
+
+# Log layout: header, the level path, one input record per tick, then (tick, hash) checkpoints
+MAGIC = b"BCRP"
+VERSION = 5  # 2: enemy contact damage applied once per tick, 3: level path and hash, 4: press counts,
+              # 5: no enemy update on the tick the player dies
+HEADER = struct.Struct("<4sHIQII8sH")  # magic, version, hash interval, seed, ticks, checkpoints, level hash, path length
+CHECKPOINT = struct.Struct("<IQ")   # tick, state hash
+
+# Input record: a byte of bits for the actions held during the tick and the window being closed, then
+# for each pressed action the number of presses (KEYDOWN) in the tick, since every press counts.
+# Actions are recorded, not keys, and replayed on their default keys whatever the bindings were.
+HELD_ACTIONS = ["left", "right", "up", "down"]
+PRESSED_ACTIONS = ["shoot", "quit"]
+QUIT_BIT = 1 << len(HELD_ACTIONS)
+RECORD = struct.Struct("<B" + "B" * len(PRESSED_ACTIONS))
+
+class ReplayDesync(Exception):
+    def __init__(self, tick, expected, actual):
+        super().__init__(f"replay desynced at tick {tick}: state hash {actual:016x}, recorded {expected:016x}")
+        self.tick = tick
+
+def encode(events, keys, bindings=DEFAULT_BINDINGS):
+    # Pack one tick of gameplay input into a record
+    bits = 0
+    for index, action in enumerate(HELD_ACTIONS):
+        if any(keys[key] for key in bindings[action]):
+            bits |= 1 << index
+    counts = [0] * len(PRESSED_ACTIONS)
+    for event in events:
+        if event.type == pygame.KEYDOWN:
+            for index, action in enumerate(PRESSED_ACTIONS):
+                if event.key in bindings[action]:
+                    counts[index] = min(counts[index] + 1, 255)
+        if event.type == pygame.QUIT:
+            bits |= QUIT_BIT
+    return RECORD.pack(bits, *counts)
+
+def decode(record):
+    bits, *counts = RECORD.unpack(record)
+    held = [DEFAULT_BINDINGS[action][0] for index, action in enumerate(HELD_ACTIONS) if bits & (1 << index)]
+    events = [key_event(DEFAULT_BINDINGS[action][0]) for action, count in zip(PRESSED_ACTIONS, counts)
+              for _ in range(count)]
+    if bits & QUIT_BIT:
+        events.append(pygame.event.Event(pygame.QUIT))
+    return events, held
+
+class Recorder:
+    def __init__(self, game, source, seed, hash_interval=60):
+        # Input source wrapper that logs every tick's input and a state hash every hash_interval ticks
+        self.game = game
+        self.source = source
+        self.seed = seed
+        self.hash_interval = hash_interval
+        self.inputs = bytearray()
+        self.checkpoints = []
+        self.keys = HeldKeys(())
+
+    def events(self):
+        # Called once per tick before the scene acts on input, so the hash covers the previous ticks
+        tick = len(self.inputs) // RECORD.size
+        if tick % self.hash_interval == 0:
+            self.checkpoints.append((tick, self.game.state_hash()))
+        events = self.source.events()
+        self.keys = self.source.pressed()
+        self.inputs += encode(events, self.keys, self.game.input_pipeline.bindings)
+        return events
+
+    def pressed(self):
+        return self.keys
+
+    def save(self, path):
+        ticks = len(self.inputs) // RECORD.size
+        checkpoints = self.checkpoints + [(ticks, self.game.state_hash())]
+        with open(path, "wb") as file:
+            level = self.game.level
+            path_bytes = level.path.encode()
+            file.write(HEADER.pack(MAGIC, VERSION, self.hash_interval, self.seed, ticks, len(checkpoints),
+                                   bytes.fromhex(level.hash), len(path_bytes)))
+            file.write(path_bytes)
+            file.write(self.inputs)
+            for tick, digest in checkpoints:
+                file.write(CHECKPOINT.pack(tick, digest))
+
+class Replay:
+    def __init__(self, path):
+        with open(path, "rb") as file:
+            data = file.read()
+        magic, version = struct.unpack_from("<4sH", data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} replay")
+        _, _, self.hash_interval, self.seed, ticks, count, level_hash, length = HEADER.unpack_from(data)
+        self.level_hash = level_hash.hex()
+        start = HEADER.size
+        self.level_path = data[start:start + length].decode()
+        start += length
+        self.ticks = ticks
+        self.inputs = data[start:start + ticks * RECORD.size]
+        start += ticks * RECORD.size
+        self.checkpoints = dict(CHECKPOINT.unpack_from(data, start + index * CHECKPOINT.size) for index in range(count))
+
+class ReplayInput:
+    def __init__(self, game, replay):
+        # Feeds recorded input back tick by tick and checks the state hash at every checkpoint
+        self.game = game
+        self.replay = replay
+        self.tick = 0
+        self.keys = HeldKeys(())
+
+    def verify(self):
+        expected = self.replay.checkpoints.get(self.tick)
+        if expected is not None:
+            actual = self.game.state_hash()
+            if actual != expected:
+                raise ReplayDesync(self.tick, expected, actual)
+
+    def events(self):
+        self.verify()
+        start = self.tick * RECORD.size
+        events, held = decode(self.replay.inputs[start:start + RECORD.size])
+        self.keys = HeldKeys(held)
+        self.tick += 1
+        return events
+
+    def pressed(self):
+        return self.keys
+
+    def finished(self):
+        return self.tick >= self.replay.ticks
+
+def play(path, render=False):
+    # Re-run a recorded session as fast as possible; returns the number of ticks verified.
+    # Raises ReplayDesync when the simulation diverges from the recording.
+    from game import Game
+    replay = Replay(path)
+    game = Game(headless=not render, level_path=replay.level_path, ai_budget_us=None)  # Thinks exactly as the recording did
+    if game.level.hash != replay.level_hash:
+        raise ValueError(f"{replay.level_path} or its images changed since {path} was recorded")
+    replay_input = ReplayInput(game, replay)
+    game.input = replay_input
+    game.new_session(replay.seed)
+    game.change_scene("playing")
+    try:
+        while not replay_input.finished():
+            game.update()
+            if render:
+                game.render(1.0)
+    except SystemExit:
+        pass  # The recorded session ended by quitting the game
+    replay_input.verify()  # Final checkpoint
+    return replay_input.tick
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay and verify a recorded Battle City session")
+    parser.add_argument("path")
+    parser.add_argument("--render", action="store_true", help="show the replay in a window")
+    args = parser.parse_args(argv)
+    try:
+        ticks = play(args.path, args.render)
+    except ReplayDesync as error:
+        print(error)
+        return 1
+    print(f"{ticks} ticks replayed, state matches the recording")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
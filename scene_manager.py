@@ -0,0 +1,51 @@
+from collections import deque
+
+class SceneManager:
+    def __init__(self, game, scene_types):
+        # Builds each scene once, by name (scene_types maps names to Scene classes), and reuses it on
+        # every later visit; enter() and exit() run on each transition. Scenes that can be reached
+        # from the current one are built ahead of time by preload_step() so switching never loads.
+        self.game = game
+        self.scene_types = scene_types
+        self.scenes = {}
+        self.pending = deque()  # Names waiting to be preloaded, nearest first
+        self.current = None
+
+    def get(self, name):
+        scene = self.scenes.get(name)
+        if scene is None:
+            scene = self.scene_types[name](self.game)
+            self.scenes[name] = scene
+        return scene
+
+    def change(self, name):
+        # Leave the current scene and enter the named one, which becomes game.current_scene
+        if self.current is not None:
+            self.current.exit()
+        self.current = self.get(name)
+        self.game.current_scene = self.current
+        self.current.enter()
+        self.queue_reachable(name)
+        return self.current
+
+    def queue_reachable(self, name):
+        # Queue the scenes reachable from name that are not built yet, breadth first
+        seen = set(self.scenes) | set(self.pending)
+        frontier = deque(self.scene_types[name].next_scenes)
+        while frontier:
+            name = frontier.popleft()
+            if name in seen:
+                continue
+            seen.add(name)
+            self.pending.append(name)
+            frontier.extend(self.scene_types[name].next_scenes)
+
+    def preload_step(self):
+        # Build at most one queued scene; called on idle frames, where there is time to spare.
+        # Returns whether a scene was built.
+        while self.pending:
+            name = self.pending.popleft()
+            if name not in self.scenes:
+                self.get(name)
+                return True
+        return False
@@ -1,31 +1,55 @@
-from enemy import EnemyFactory
-from player import Player
+from enemy import ENEMY_SPRITES
 from point import Point
-import random
+from assets import assets
+from text import text_cache
 import pygame
-import sys
 pygame.font.init()
 
 class Scene:
+    idle = False # Idle scenes only react to input and are drawn at a reduced frame rate
+    music = None # Track streamed while the scene is current, None for silence
+    next_scenes = () # Names of the scenes this one can switch to, preloaded by the SceneManager
+
     def __init__(self, game):
         self.game = game # Reference to the Game object
 
-    def start(self):
-        # Abstract method to be overridden by subclasses for scene initialization
+    def enter(self):
+        # Called every time the scene becomes the current one; scenes are built once and reused,
+        # so per-visit state is set up here rather than in __init__
+        pass
+
+    def exit(self):
+        # Called when the game switches away from the scene
         pass
 
-    def update(self):
-        # Abstract method to be overridden by subclasses for scene updates
+    def update(self, snapshot):
+        # Abstract method to be overridden by subclasses for scene updates, snapshot is the tick's
+        # InputSnapshot; buffered presses are taken from game.input_pipeline
+        pass
+
+    def draw(self):
+        # Abstract method to be overridden by subclasses for scene rendering
         pass
 
+    def handle_window(self, snapshot):
+        # Window closed ends the game; uncovered or restored, the next frame has to repaint everything
+        if snapshot.quit:
+            self.game.end()
+        if snapshot.expose:
+            self.game.renderer.invalidate()
+
 class MainMenu(Scene):
+    idle = True
+    music = "sounds/bg_sound_play.wav"
+    next_scenes = ("playing", "instruction")
+
     def __init__(self, game):
         # Initialize the MainMenu scene
         super().__init__(game)
-        self.background = pygame.image.load("images/main_bg.jpg")
-        self.document = pygame.image.load("images/document.png")
-        self.play_button = pygame.image.load("images/play_btn.png")
-        self.quit_button = pygame.image.load("images/quit_btn.png")
+        self.background = assets.image("images/main_bg.jpg")
+        self.document = assets.image("images/document.png")
+        self.play_button = assets.image("images/play_btn.png")
+        self.quit_button = assets.image("images/quit_btn.png")
         self.play_button_rect = self.play_button.get_rect()
         self.quit_button_rect = self.quit_button.get_rect()
         self.document_rect = self.document.get_rect()
@@ -34,44 +58,42 @@ class MainMenu(Scene):
         self.document = pygame.transform.scale(self.document, (50, 50))
         self.document_rect.topright = (800, 40)  # Position in the top right corner
 
-        # Load sound effects
-        self.bg_sound = pygame.mixer.Sound("sounds/bg_sound_play.wav")
-
-    def update(self):
-        # Update method for MainMenu scene handling events
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
+    def update(self, snapshot):
+        # Update method for MainMenu scene handling input
+        self.handle_window(snapshot)
+        controls = self.game.input_pipeline
+        if controls.take("quit"):
+            self.game.end()
+        click = controls.take("click")
+        if click is not None:
+            if self.play_button_rect.collidepoint(click.position):  # Position of the mouse cursor during the click
+                self.game.new_session()
+                self.game.change_scene("playing")
+            elif self.quit_button_rect.collidepoint(click.position):
                 self.game.end()
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_q:
-                    self.game.end()
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                if self.play_button_rect.collidepoint(event.pos):  # event.pos - position of the mouse cursor during event
-                    self.bg_sound.set_volume(0)
-                    self.game.change_scene(Playing(self.game))
-                    self.game.start_coin_generation()
-                    self.bg_sound.set_volume(0)
-                elif self.quit_button_rect.collidepoint(event.pos):
-                    self.game.end()
-                elif self.document_rect.collidepoint(event.pos):
-                    self.game.change_scene(Instruction(self.game))
-        # Draw the MainMenu scene
-        self.draw()
-        self.bg_sound.play(loops=-1)
+            elif self.document_rect.collidepoint(click.position):
+                self.game.change_scene("instruction")
 
     def draw(self):
-        # Draw method to render MainMenu scene elements
+        # Draw method to render MainMenu scene elements, the menu is static so it is only
+        # drawn when the scene was entered or the window needs repainting
+        if not self.game.renderer.full_redraw:
+            return
         self.game.screen.blit(self.background, (0, 0))  # Blit layering objects
         self.game.screen.blit(self.play_button, self.play_button_rect.topleft)
         self.game.screen.blit(self.quit_button, self.quit_button_rect.topleft)
         self.game.screen.blit(self.document, self.document_rect.topleft)
-        pygame.display.flip()  # Updates the entire display with everything
+        self.game.renderer.present()  # Updates the entire display with everything
 
 class Instruction(Scene):
+    idle = True
+    music = MainMenu.music  # The menu music keeps playing while the instructions are open
+    next_scenes = ("main_menu",)
+
     def __init__(self, game):
         super().__init__(game)
-        self.background = pygame.image.load("images/document_bg.jpg")
-        self.document = pygame.image.load("images/document.png")
+        self.background = assets.image("images/document_bg.jpg")
+        self.document = assets.image("images/document.png")
         self.document_rect = self.document.get_rect()
         self.document = pygame.transform.scale(self.document, (50, 50))
         self.document_rect.topright = (800, 40)
@@ -90,25 +112,23 @@ class Instruction(Scene):
         self.load_instruction_texts()
 
     def load_instruction_texts(self):
-        self.font = pygame.font.Font(pygame.font.get_default_font(), 36)  # Use default system font
         for index, line in enumerate(self.instructions):
-            text_surface = self.font.render(line, True, (192,192,192))
+            text_surface = text_cache.render(line, 36, (192,192,192))  # Default system font
             text_rect = text_surface.get_rect(center=(self.game.screen.get_width() // 2, 200 + index * 40))
             self.instruction_texts.append((text_surface, text_rect))
 
-    def update(self):
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                self.game.end()
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_q:
-                    self.game.end()
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                if self.document_rect.collidepoint(event.pos): 
-                    self.game.change_scene(MainMenu(self.game))
-        self.draw()
+    def update(self, snapshot):
+        self.handle_window(snapshot)
+        controls = self.game.input_pipeline
+        if controls.take("quit"):
+            self.game.end()
+        click = controls.take("click")
+        if click is not None and self.document_rect.collidepoint(click.position):
+            self.game.change_scene("main_menu")
 
     def draw(self):
+        if not self.game.renderer.full_redraw:
+            return  # Static screen, nothing changed since the last frame
         self.game.screen.blit(self.background, (0, 0))
         self.game.screen.blit(self.document, self.document_rect.topleft)  # Instruction screen background
 
@@ -116,128 +136,144 @@ class Instruction(Scene):
         for text_surface, text_rect in self.instruction_texts:
             self.game.screen.blit(text_surface, text_rect)
 
-        pygame.display.flip()
+        self.game.renderer.present()
+
+# Movement actions and the player's step for each, applied in this order
+MOVES = [("left", (-2, 0)), ("right", (2, 0)), ("up", (0, -2)), ("down", (0, 2))]
 
 class Playing(Scene):
-    def start(self):
-        # Initializing player, enemies list, and initial spawns
-        self.player = Player(150, Point(150, 450))
+    next_scenes = ("game_over",)
+
+    def __init__(self, game):
+        super().__init__(game)
         self.enemies = []
+
+    def enter(self):
+        # Initializing enemies list and initial spawns, the player is the game's; coins spawn while playing
+        self.enemies = []
+        if self.game.enemy_store is not None:
+            self.game.enemy_store.clear()  # Rows of the last session, its respawns went with its scheduler
         self.spawn_initial_enemies()
+        self.game.start_coin_generation()
+
+    def exit(self):
+        self.game.stop_coin_generation()
 
     def spawn_initial_enemies(self):
-        # Spawn initial enemies for the Playing scene with border limits and area limits
-        min_x, min_y = 100, 200
-        max_x, max_y = 462 - 40, 485 - 40
-
-        # Spawn 4 basic enemies
-        for _ in range(4):
-            position = self.get_random_valid_position(min_x, min_y, max_x, max_y)
-            self.spawn_enemy("basic", 50, position)
-
-        # Spawn 4 advanced enemies
-        for _ in range(4):
-            position = self.get_random_valid_position(min_x, min_y, max_x, max_y)
-            self.spawn_enemy("advanced", 100, position)
-
-    def update(self):
-        # Handling events, player controls, enemy updates, and game state checks
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                self.game.end()
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_q:
-                    self.game.stop_coin_generation()
-                    self.game.change_scene(GameOver(self.game))
-                if event.key == pygame.K_SPACE:
-                    self.game.player.shoot(self.game)
-
-        keys = pygame.key.get_pressed()
-        if keys[pygame.K_LEFT]:
-            self.game.player.move(-2, 0, self.game)
-        if keys[pygame.K_RIGHT]:
-            self.game.player.move(2, 0, self.game)
-        if keys[pygame.K_UP]:
-            self.game.player.move(0, -2, self.game)
-        if keys[pygame.K_DOWN]:
-            self.game.player.move(0, 2, self.game)
-
-        self.game.update_bullets()  # Update bullets
-        self.check_player_health()  # Check player health after updates
-        self.update_enemies()       # Update enemies
+        # Spawn the level's enemy roster, each entry in its spawn zone
+        level = self.game.level
+        for entry in level.roster:
+            for _ in range(entry["count"]):
+                position = self.get_random_valid_position(*level.spawn_zones[entry["zone"]], ENEMY_SPRITES[entry["type"]])
+                if position is not None:
+                    self.spawn_enemy(entry["type"], entry["health"], position)
+
+    def update(self, snapshot):
+        # Handling input, player controls, enemy updates, and game state checks
+        profiler = self.game.profiler
+        self.game.stats.survival_time += self.game.loop.dt
+        self.handle_window(snapshot)
+        controls = self.game.input_pipeline
+        if controls.take("overlay"):
+            self.game.toggle_overlay()
+        if controls.take("export_profile"):
+            self.game.export_profile()
+        if controls.take("quit"):
+            self.game.change_scene("game_over")
+            return  # Left the scene, nothing of this tick may change it again
+
+        with profiler.section("player"):
+            while controls.take("shoot"):  # Every press fires, however many arrived since the last tick
+                self.game.player.shoot(self.game)
+            for action, (x, y) in MOVES:
+                if snapshot.holding(action):
+                    self.game.player.move(x, y, self.game)
+
+        with profiler.section("bullets"):
+            self.game.update_bullets()  # Update bullets
+        if self.check_player_health():  # Check player health after updates
+            return  # The session is over and stored, enemies must not add to its stats
+        with profiler.section("enemies"):
+            self.update_enemies()       # Update enemies
+
+    def draw(self):
         self.game.draw()            # Update the game's display
 
-    def get_random_valid_position(self, min_x, min_y, max_x, max_y):
-        # Get a random valid position within accepteable area (limit borders and area)
-        valid_position_found = False
-        # Loop until valid position found
-        while not valid_position_found:
-            x = random.randint(min_x, max_x)
-            y = random.randint(min_y, max_y)
-            if not self.game.check_collision(x, y):
-                valid_position_found = True
-        return Point(x, y) # Return Point object with valid coordinates
+    def get_random_valid_position(self, min_x, min_y, max_x, max_y, sprite):
+        # Get a random valid position within accepteable area (limit borders and area),
+        # away from the player and the enemies already spawned. None if there is no room left.
+        occupied = [enemy.get_rect() for enemy in self.enemies]
+        occupied.append(self.game.player.get_rect())
+        position = self.game.spawn_index(sprite, (min_x, min_y, max_x, max_y)).sample(occupied, self.game.rng)
+        if position is None:
+            return None
+        return Point(*position) # Return Point object with valid coordinates
 
     def spawn_enemy(self, enemy_type, health, position: Point):
         # Spawn an enemy of specified type at given position
-        enemy = EnemyFactory.create_enemy(enemy_type, health, position)
+        enemy = self.game.create_enemy(enemy_type, health, position)
         self.enemies.append(enemy)
 
     def update_enemies(self):
-        # Update all enemies in the Playing scene
-        for enemy in self.enemies:
-            enemy.move(self.game)
+        # Update all enemies in the Playing scene within the AI budget, the flow field is only rebuilt
+        # when the player changes cell
+        self.game.flow_field.update(self.game.player.position.getX(), self.game.player.position.getY())
+        self.game.ai.update(self.game, self.enemies)
 
     def check_player_health(self):
-        # Check player health and change scene to GameOver if health drops to zero
+        # Check player health and change scene to GameOver if health drops to zero; True if it did
         if self.game.player.health <= 0:
-            self.game.stop_coin_generation()
-            self.game.change_scene(GameOver(self.game))
+            self.game.change_scene("game_over")
+            return True
+        return False
 
 class GameOver(Scene):
+    idle = True
+
     def __init__(self, game):
         # Initialize the GameOver scene
         super().__init__(game)
-        self.background = pygame.image.load("images/over_bg.jpg")
+        self.background = assets.image("images/over_bg.jpg")
 
-        # Initialize Pygame font module
-        self.font = pygame.font.Font(pygame.font.get_default_font(), 36) # Use default system font
+    def enter(self):
+        # Store the session's stats and keep its profile, if one was asked for
+        self.game.finish_session()
+        self.best = None  # Looked up when drawn, headless games never need it
+        if self.game.profile_path:
+            self.game.export_profile()
 
-    def update(self):
-        # Scene handling events and drawing
-        self.draw()
+    def update(self, snapshot):
+        # Scene handling input
+        self.handle_window(snapshot)
+        if self.game.input_pipeline.take("quit"):
+            self.game.end()
 
     def draw(self):
-        # Draw method to render GameOver scene elements
-        # Clear objects in the Playing scene
-        if isinstance(self.game.current_scene, Playing):
-            self.game.current_scene.enemies.clear()
-            self.game.current_scene.bullets.clear()
-            self.game.current_scene.coins.clear()
-            self.game.current_scene.collected_coins.clear()
+        # Draw method to render GameOver scene elements, only when entered or exposed
+        if not self.game.renderer.full_redraw:
+            return
 
         # Display the background image
         self.game.screen.blit(self.background, (0, 0))
 
         # Display "Game Over" text
-        text = self.font.render("Game Over", True, (255, 255, 255))
+        text = text_cache.render("Game Over", 36, (255, 255, 255)) # Default system font
         text_rect = text.get_rect(center=(self.game.screen.get_width() // 2, 100))
         self.game.screen.blit(text, text_rect)
 
-        # Calculate and display the score of collected coins
-        score_text = f"Score: {len(self.game.collected_coins)}"
-        score_rendered = self.font.render(score_text, True, (255, 255, 255))
+        # Display the score and, when stats are stored, the best score on this level
+        if self.best is None:
+            self.best = self.game.best_score()
+        score_text = f"Score: {self.game.stats.score}"
+        score_rendered = text_cache.render(score_text, 36, (255, 255, 255))
         score_rect = score_rendered.get_rect(center=(self.game.screen.get_width() // 2, 150))
         self.game.screen.blit(score_rendered, score_rect)
+        if self.best is not None:
+            best_rendered = text_cache.render(f"Best: {self.best}", 28, (255, 255, 255))
+            best_rect = best_rendered.get_rect(center=(self.game.screen.get_width() // 2, 190))
+            self.game.screen.blit(best_rendered, best_rect)
+
+        self.game.renderer.present()  # Update the display
 
-        pygame.display.flip()  # Update the display
-
-        # Handle events
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_q:
-                    pygame.quit()
-                    sys.exit()
\ No newline at end of file
+# Scene names used by Game.change_scene
+SCENES = {"main_menu": MainMenu, "instruction": Instruction, "playing": Playing, "game_over": GameOver}
\ No newline at end of file
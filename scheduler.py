@@ -0,0 +1,51 @@
+import heapq
+
+class Event:
+    def __init__(self, when, callback, args, tag):
+        self.when = when
+        self.callback = callback
+        self.args = args
+        self.tag = tag  # Name for the kind of event, e.g. "respawn", to find or cancel it later
+        self.cancelled = False
+
+class Scheduler:
+    def __init__(self):
+        # Timed callbacks on simulation time, which only moves when the game ticks, kept in a
+        # min-heap so each tick only looks at the events that are due
+        self.time = 0.0
+        self.heap = []
+        self.sequence = 0  # Tie-breaker keeping events due at the same time in scheduling order
+
+    def schedule(self, delay, callback, *args, tag=None):
+        # Run callback(*args) once delay seconds of simulation time have passed
+        event = Event(self.time + delay, callback, args, tag)
+        heapq.heappush(self.heap, (event.when, self.sequence, event))
+        self.sequence += 1
+        return event
+
+    def cancel(self, event):
+        # Cancelled events stay in the heap and are skipped when they come due
+        event.cancelled = True
+
+    def cancel_tag(self, tag):
+        for event in self.pending(tag):
+            event.cancelled = True
+
+    def advance(self, dt):
+        # Move simulation time forward and run every event that became due, in time order
+        self.time += dt
+        heap = self.heap
+        while heap and heap[0][0] <= self.time:
+            event = heapq.heappop(heap)[2]
+            if not event.cancelled:
+                event.callback(*event.args)
+
+    def pending(self, tag=None):
+        # Events still waiting to run, optionally only those with the given tag
+        return [entry[2] for entry in self.heap if not entry[2].cancelled and (tag is None or entry[2].tag == tag)]
+
+    def clear(self):
+        self.heap.clear()
+
+    def __len__(self):
+        return len(self.heap)
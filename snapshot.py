@@ -0,0 +1,148 @@
+from scheduler import Scheduler
+from scenes import Playing
+from point import Point
+from stats import Stats
+import pickle
+
+# A snapshot is a plain tuple of numbers, strings and tuples: no surfaces, masks or object references,
+# so it is cheap to take, can be pickled for save games and restores into any Game instance
+VERSION = 4
+
+def capture(game):
+    # Take a snapshot of the simulation state of the game
+    scheduler = game.scheduler
+    player = game.player
+    enemies = game.current_scene.enemies if isinstance(game.current_scene, Playing) else ()
+    respawns = tuple((event.when, event.args[0].kind, event.args[0].position.getX(), event.args[0].position.getY(),
+                      event.args[0].initial_health) for event in scheduler.pending("respawn"))
+    coin_spawn = [event.when for event in scheduler.pending("coin")]
+    invulnerability = [event.when for event in scheduler.pending("invulnerability")]
+    return (
+        VERSION,
+        scheduler.time,
+        game.rng.getstate(),
+        (player.position.getX(), player.position.getY(), player.health,
+         player.direction.getX(), player.direction.getY(), player.invulnerable),
+        tuple((enemy.kind, enemy.position.getX(), enemy.position.getY(), enemy.health, enemy.initial_health,
+               enemy.heading, enemy.next_think) for enemy in enemies),
+        respawns,
+        capture_bullets(game),
+        tuple((coin.position.getX(), coin.position.getY()) for coin in game.coins),
+        capture_stats(game.stats),
+        game.coins_enabled,
+        coin_spawn[0] if coin_spawn else None,
+        invulnerability[0] if invulnerability else None,
+        (game.ai.tick, game.ai.cursor),
+    )
+
+def capture_stats(stats):
+    return (stats.score, stats.coins, tuple(sorted(stats.kills.items())), stats.shots, stats.damage_taken,
+            stats.survival_time)
+
+def capture_bullets(game):
+    store = game.bullet_store
+    if store is not None:
+        count = store.count
+        return tuple(zip(store.x[:count].tolist(), store.y[:count].tolist(),
+                         store.dx[:count].tolist(), store.dy[:count].tolist()))
+    return tuple((bullet.position.getX(), bullet.position.getY(), bullet.direction.getX(), bullet.direction.getY())
+                 for bullet in game.bullets)
+
+def restore(game, snapshot):
+    # Put the game back into the state captured by snapshot; the current scene must be Playing
+    # for enemies to be restored
+    if snapshot[0] != VERSION:
+        raise ValueError(f"snapshot version {snapshot[0]}, expected {VERSION}")
+    (_, time, rng_state, player_state, enemies, respawns, bullets, coins,
+     stats, coins_enabled, coin_spawn, invulnerability, ai) = snapshot
+
+    game.rng.setstate(rng_state)
+    x, y, health, direction_x, direction_y, invulnerable = player_state
+    player = game.player
+    player.position.setX(x)
+    player.position.setY(y)
+    player.health = health
+    player.direction = Point(direction_x, direction_y)
+    player.invulnerable = invulnerable
+
+    if game.enemy_store is not None:
+        game.enemy_store.clear()  # Every enemy below, waiting respawns included, takes a fresh row
+    if isinstance(game.current_scene, Playing):
+        current = game.current_scene.enemies  # Reused where the kinds line up, images and masks are kept
+        game.current_scene.enemies = [reuse_enemy(game, current[index], *enemy)
+                                      if index < len(current) and current[index].kind == enemy[0] else make_enemy(game, *enemy)
+                                      for index, enemy in enumerate(enemies)]
+
+    game.bullets.clear()
+    store = game.bullet_store
+    if store is not None:
+        store.clear()
+        count = len(bullets)
+        if count > store.capacity:
+            store.allocate(max(count, store.capacity * 2))
+        if count:
+            store.x[:count], store.y[:count], store.dx[:count], store.dy[:count] = zip(*bullets)
+        store.health[:count] = 10  # Damage, as in Player.shoot
+        store.kind[:count] = 0
+        store.count = count
+        bullets = ()
+    for bullet_state in bullets:
+        bullet = game.bullets.acquire()
+        if bullet is not None:  # A smaller pool than the captured game's keeps what fits
+            bullet.reset(*bullet_state)
+    game.coins.clear()
+    for coin_state in coins:
+        coin = game.coins.acquire()
+        if coin is not None:
+            coin.reset(*coin_state)
+
+    game.stats = Stats()
+    score, coins_collected, kills, shots, damage_taken, survival_time = stats
+    game.stats.score = score
+    game.stats.coins = coins_collected
+    game.stats.kills = dict(kills)
+    game.stats.shots = shots
+    game.stats.damage_taken = damage_taken
+    game.stats.survival_time = survival_time
+    game.coins_enabled = coins_enabled
+    game.ai.tick, game.ai.cursor = ai
+
+    # Timed events are rebuilt on a fresh scheduler at the captured time
+    scheduler = Scheduler()
+    scheduler.time = time
+    game.scheduler = scheduler
+    for when, kind, x, y, initial_health in respawns:
+        enemy = make_enemy(game, kind, x, y, 0, initial_health)
+        scheduler.schedule(when - time, game.respawn_enemy, enemy, tag="respawn")
+    game.coin_spawn_event = None
+    if coin_spawn is not None:
+        game.coin_spawn_event = scheduler.schedule(coin_spawn - time, game.spawn_coin, tag="coin")
+    if invulnerability is not None:
+        scheduler.schedule(invulnerability - time, game.end_invulnerability, tag="invulnerability")
+
+def make_enemy(game, kind, x, y, health, initial_health, heading=(0, 0), next_think=0):
+    enemy = game.create_enemy(kind, initial_health, Point(x, y))
+    enemy.health = health
+    enemy.heading = heading
+    enemy.next_think = next_think
+    return enemy
+
+def reuse_enemy(game, enemy, kind, x, y, health, initial_health, heading=(0, 0), next_think=0):
+    # Put an existing enemy of the same kind into the captured state, keeping its image and mask
+    if game.enemy_store is not None:
+        game.enemy_store.add_enemy(kind, initial_health, x, y, view=enemy)  # The view moves to a fresh row
+    enemy.position.setX(x)
+    enemy.position.setY(y)
+    enemy.health = health
+    enemy.initial_health = initial_health
+    enemy.heading = heading
+    enemy.next_think = next_think
+    return enemy
+
+def save(snapshot, path):
+    with open(path, "wb") as file:
+        pickle.dump(snapshot, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+def load(path):
+    with open(path, "rb") as file:
+        return pickle.load(file)
@@ -0,0 +1,46 @@
+class SpatialHash:
+    def __init__(self, cell_size=32):
+        # Uniform grid broadphase: each entity is bucketed into every cell its rect touches,
+        # so a query only looks at entities in the cells around the queried rect
+        self.cell_size = cell_size
+        self.cells = {}
+        self.entries = {}  # entity -> (kind, rect, cells)
+
+    def clear(self):
+        self.cells.clear()
+        self.entries.clear()
+
+    def cells_for(self, rect):
+        size = self.cell_size
+        return [(cx, cy)
+                for cx in range(rect.left // size, (rect.right - 1) // size + 1)
+                for cy in range(rect.top // size, (rect.bottom - 1) // size + 1)]
+
+    def insert(self, entity, kind, rect):
+        if entity in self.entries:
+            self.remove(entity)
+        cells = self.cells_for(rect)
+        for cell in cells:
+            self.cells.setdefault(cell, []).append(entity)
+        self.entries[entity] = (kind, rect, cells)
+
+    def remove(self, entity):
+        entry = self.entries.pop(entity, None)
+        if entry is None:
+            return
+        for cell in entry[2]:
+            self.cells[cell].remove(entity)
+
+    def query(self, rect, kind=None):
+        # Entities of the given kind whose bounding rect overlaps rect
+        found = []
+        seen = set()
+        for cell in self.cells_for(rect):
+            for entity in self.cells.get(cell, ()):
+                if entity in seen:
+                    continue
+                seen.add(entity)
+                entity_kind, entity_rect, _ = self.entries[entity]
+                if (kind is None or entity_kind == kind) and entity_rect.colliderect(rect):
+                    found.append(entity)
+        return found
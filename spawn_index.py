@@ -0,0 +1,51 @@
+from array import array
+import random
+import pygame
+
+class SpawnIndex:
+    def __init__(self, collision_map, sprite, region, attempts=16, positions=None):
+        # Every top-left position inside region (min_x, min_y, max_x, max_y, inclusive) where the sprite
+        # does not touch the borders, stored as two compact coordinate arrays. positions, the (xs, ys)
+        # arrays of an earlier scan (e.g. from the level cache), skips the scan.
+        self.sprite = sprite
+        self.region = region
+        self.size = sprite[1]
+        self.attempts = attempts  # Random draws tried before falling back to a scan
+        if positions is not None:
+            self.xs, self.ys = positions
+            return
+        self.xs = array('H')
+        self.ys = array('H')
+        min_x, min_y, max_x, max_y = region
+        for y in range(min_y, max_y + 1):
+            for x in range(min_x, max_x + 1):
+                if not collision_map.collides(sprite, x, y):
+                    self.xs.append(x)
+                    self.ys.append(y)
+
+    def __len__(self):
+        return len(self.xs)
+
+    def sample(self, occupied=(), rng=random):
+        # Uniformly pick a free position whose footprint does not overlap any rect in occupied.
+        # Returns (x, y), or None when the region has no free position left.
+        count = len(self.xs)
+        if count == 0:
+            return None
+        width, height = self.size
+        rect = pygame.Rect(0, 0, width, height)
+        occupied = list(occupied)
+        for _ in range(self.attempts):
+            index = rng.randrange(count)
+            rect.topleft = (self.xs[index], self.ys[index])
+            if rect.collidelist(occupied) == -1:
+                return rect.topleft
+
+        # Densely occupied: scan once from a random start, so the cost stays bounded by the index size
+        start = rng.randrange(count)
+        for offset in range(count):
+            index = (start + offset) % count
+            rect.topleft = (self.xs[index], self.ys[index])
+            if rect.collidelist(occupied) == -1:
+                return rect.topleft
+        return None
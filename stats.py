@@ -0,0 +1,95 @@
+import argparse
+import sqlite3
+import json
+import time
+
+KILL_REWARD = 5  # Score for destroying an enemy, the old five reward coins
+
+class Stats:
+    def __init__(self):
+        # Counters of one play session, every update is O(1) and nothing grows with playtime
+        self.score = 0          # Collected coins plus kill rewards
+        self.coins = 0          # Coins picked up
+        self.kills = {}         # Enemy kind -> enemies destroyed
+        self.shots = 0
+        self.damage_taken = 0
+        self.survival_time = 0.0  # Seconds of simulation time spent playing
+
+    def add_coin(self):
+        self.coins += 1
+        self.score += 1
+
+    def add_kill(self, kind):
+        self.kills[kind] = self.kills.get(kind, 0) + 1
+        self.score += KILL_REWARD
+
+    def total_kills(self):
+        return sum(self.kills.values())
+
+    def as_dict(self):
+        return {"score": self.score, "coins": self.coins, "kills": dict(self.kills), "shots": self.shots,
+                "damage_taken": self.damage_taken, "survival_time": self.survival_time}
+
+class StatsStore:
+    def __init__(self, path, batch_size=32):
+        # Append-only SQLite table of finished sessions. Results are buffered and written batch_size
+        # at a time in one transaction; flush() or close() writes what is left.
+        self.connection = sqlite3.connect(path, timeout=30)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS sessions (id INTEGER PRIMARY KEY, finished REAL, level TEXT, seed INTEGER,"
+            " score INTEGER, coins INTEGER, kills INTEGER, kills_by_type TEXT, shots INTEGER,"
+            " damage_taken INTEGER, survival_time REAL)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS sessions_score ON sessions (score DESC)")
+        self.connection.commit()
+        self.batch_size = batch_size
+        self.pending = []
+
+    def record(self, stats, level=None, seed=None):
+        self.pending.append((time.time(), level, seed, stats.score, stats.coins, stats.total_kills(),
+                             json.dumps(stats.kills, sort_keys=True), stats.shots, stats.damage_taken,
+                             stats.survival_time))
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO sessions (finished, level, seed, score, coins, kills, kills_by_type, shots,"
+                " damage_taken, survival_time) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", self.pending)
+        self.pending.clear()
+
+    def high_scores(self, limit=10, level=None):
+        # Best sessions first, as dicts; includes results not flushed yet
+        self.flush()
+        query = "SELECT finished, level, seed, score, coins, kills, kills_by_type, shots, damage_taken, survival_time FROM sessions"
+        arguments = ()
+        if level is not None:
+            query += " WHERE level = ?"
+            arguments = (level,)
+        cursor = self.connection.execute(query + " ORDER BY score DESC, survival_time ASC LIMIT ?", arguments + (limit,))
+        columns = [column[0] for column in cursor.description]
+        scores = [dict(zip(columns, row)) for row in cursor]
+        for score in scores:
+            score["kills_by_type"] = json.loads(score["kills_by_type"])
+        return scores
+
+    def close(self):
+        self.flush()
+        self.connection.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show the high scores of a Battle City stats store")
+    parser.add_argument("path", nargs="?", default="stats.sqlite")
+    parser.add_argument("--level", help="only sessions on this level")
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args(argv)
+    store = StatsStore(args.path)
+    for rank, session in enumerate(store.high_scores(args.limit, args.level), 1):
+        print(f"{rank:>3}. {session['score']:>6}  {session['level']:<10} {session['kills']} kills, "
+              f"{session['coins']} coins, {session['survival_time']:.1f} s")
+    store.close()
+
+if __name__ == "__main__":
+    main()
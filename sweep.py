@@ -0,0 +1,79 @@
+# Swept collision for fast movers: a move from (x, y) by (dx, dy) is walked in one-pixel steps,
+# step i of n = max(|dx|, |dy|) being at (x + dx * i // n, y + dy * i // n), so nothing thinner
+# than a pixel is ever jumped over whatever the speed. Hits are reported as the earliest step.
+
+import pygame
+
+path_masks = {}  # (dx, dy) -> (mask of the step positions 1..n, its corner offset x and y, width, height, steps, offsets)
+
+def steps_of(dx, dy):
+    return max(abs(dx), abs(dy))
+
+def step_position(x, y, dx, dy, steps, step):
+    return x + dx * step // steps, y + dy * step // steps
+
+def path_mask(dx, dy):
+    # Every step position of a move by (dx, dy) as one mask, so a clear move costs a single overlap test
+    steps = steps_of(dx, dy)
+    corner_x, corner_y = min(dx, 0), min(dy, 0)
+    width, height = abs(dx) + 1, abs(dy) + 1
+    mask = pygame.mask.Mask((width, height))
+    offsets = [step_position(0, 0, dx, dy, steps, step) for step in range(1, steps + 1)]
+    for step_x, step_y in offsets:
+        mask.set_at((step_x - corner_x, step_y - corner_y))
+    entry = path_masks[(dx, dy)] = (mask, corner_x, corner_y, width, height, steps, offsets)
+    return entry
+
+def first_blocked(collision_map, sprite, x, y, dx, dy):
+    # First step (1..n) at which the sprite hits the borders or leaves the field, None if the move is clear
+    mask, corner_x, corner_y, width, height, steps, offsets = path_masks.get((dx, dy)) or path_mask(dx, dy)
+    if steps == 0:
+        return None
+    left, top = x + corner_x, y + corner_y
+    if left >= 0 and top >= 0 and left + width <= collision_map.width and top + height <= collision_map.height:
+        # The path lies on the field: one overlap clears it, only a hit walks it for the earliest step
+        blocked = collision_map.blocked[sprite]
+        if blocked.overlap(mask, (left, top)) is None:
+            return None
+        for step, (step_x, step_y) in enumerate(offsets, 1):
+            if blocked.get_at((x + step_x, y + step_y)):
+                return step
+    for step in range(1, steps + 1):
+        if collision_map.collides(sprite, *step_position(x, y, dx, dy, steps, step)):
+            return step
+    return None
+
+def sweep_box(x, y, dx, dy, width, height, rect):
+    # Fraction (0..1) of the move at which a width x height box starting at (x, y) first overlaps
+    # rect, None if it never does. Slab test of the path against rect grown by the box size.
+    enter, leave = 0.0, 1.0
+    for start, delta, low, high in ((x, dx, rect.left - width, rect.right), (y, dy, rect.top - height, rect.bottom)):
+        if delta == 0:
+            if not low < start < high:
+                return None
+            continue
+        near, far = (low - start) / delta, (high - start) / delta
+        if near > far:
+            near, far = far, near
+        enter, leave = max(enter, near), min(leave, far)
+        if enter >= leave:
+            return None
+    return enter
+
+def first_overlap(mask, x, y, dx, dy, other_mask, other_x, other_y, rect, limit=None):
+    # First step (0..n, 0 being the start position) at which mask overlaps other_mask placed at
+    # (other_x, other_y), whose bounding box is rect; no step after limit is tested. None when the
+    # masks never touch. Paths missing rect are rejected at once, the masks are only compared at
+    # the steps where the bounding boxes overlap.
+    width, height = mask.get_size()
+    if sweep_box(x, y, dx, dy, width, height, rect) is None:
+        return None
+    steps = steps_of(dx, dy)
+    last = steps if limit is None else min(steps, limit)
+    for step in range(last + 1):
+        step_x, step_y = step_position(x, y, dx, dy, steps, step) if steps else (x, y)
+        if not (rect.left - width < step_x < rect.right and rect.top - height < step_y < rect.bottom):
+            continue
+        if mask.overlap(other_mask, (other_x - step_x, other_y - step_y)):
+            return step
+    return None
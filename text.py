@@ -0,0 +1,64 @@
+from collections import OrderedDict
+import pygame
+
+class TextCache:
+    def __init__(self, max_surfaces=128):
+        # Fonts are created once per (name, size); rendered text surfaces are kept in a bounded LRU
+        # keyed by (font, text, color, antialias) so unchanged text is never rendered twice
+        self.max_surfaces = max_surfaces
+        self.fonts = {}
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def font(self, size, name=None):
+        key = (name, size)
+        font = self.fonts.get(key)
+        if font is None:
+            if not pygame.font.get_init():
+                pygame.font.init()
+            font = pygame.font.Font(name or pygame.font.get_default_font(), size)
+            self.fonts[key] = font
+        return font
+
+    def render(self, text, size, color, name=None, antialias=True):
+        key = (name, size, text, tuple(color), antialias)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+        self.misses += 1
+        surface = self.font(size, name).render(text, antialias, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_surfaces:
+            self.surfaces.popitem(last=False)  # Drop the least recently used surface
+            self.evictions += 1
+        return surface
+
+    def stats(self):
+        return {"fonts": len(self.fonts), "surfaces": len(self.surfaces), "hits": self.hits,
+                "misses": self.misses, "evictions": self.evictions}
+
+text_cache = TextCache()  # Shared by the HUD and the scenes
+
+class TextWidget:
+    def __init__(self, template, size, color, **position):
+        # Text built from template.format(value), placed with get_rect(**position) (e.g. right=..., top=...);
+        # the surface and rect are only rebuilt when the value changes
+        self.template = template
+        self.size = size
+        self.color = color
+        self.position = position
+        self.value = None
+        self.surface = None
+        self.rect = None
+
+    def render(self, value):
+        # Return (surface, rect) for value
+        if self.surface is None or value != self.value:
+            self.value = value
+            self.surface = text_cache.render(self.template.format(value), self.size, self.color)
+            self.rect = self.surface.get_rect(**self.position)
+        return self.surface, self.rect